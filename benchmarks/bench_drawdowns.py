@@ -0,0 +1,127 @@
+"""
+Benchmark: vectorized drawdown/recovery detection vs. the original row-by-row loops.
+
+Generates synthetic GBM price histories, checks that find_major_drawdowns and
+calculate_recovery return exactly the same recovered episodes as the legacy
+implementations and reports the speed-up.
+Run with: python benchmarks/bench_drawdowns.py [rows ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rava_core import calculate_recovery, find_major_drawdowns  # noqa: E402
+
+
+def legacy_find_major_drawdowns(df, threshold=20):
+    """Original scalar implementation, kept as the reference for parity checks"""
+    major_drawdowns = []
+    current_peak_idx = 0
+    current_peak_price = df.loc[0, 'Close']
+    in_drawdown = False
+    drawdown_start_idx = None
+
+    for i in range(1, len(df)):
+        if df.loc[i, 'Close'] > current_peak_price:
+            if in_drawdown:
+                trough_idx = df.loc[drawdown_start_idx:i, 'Close'].idxmin()
+                trough_price = df.loc[trough_idx, 'Close']
+                drawdown_pct = ((trough_price - df.loc[drawdown_start_idx, 'Close']) /
+                                df.loc[drawdown_start_idx, 'Close']) * 100
+
+                if abs(drawdown_pct) >= threshold:
+                    major_drawdowns.append({
+                        'Peak_Date': df.loc[drawdown_start_idx, 'Date'],
+                        'Trough_Date': df.loc[trough_idx, 'Date'],
+                        'Peak_Price': df.loc[drawdown_start_idx, 'Close'],
+                        'Trough_Price': trough_price,
+                        'Drawdown_Pct': drawdown_pct,
+                        'Duration_Days': (df.loc[trough_idx, 'Date'] - df.loc[drawdown_start_idx, 'Date']).days
+                    })
+                in_drawdown = False
+
+            current_peak_idx = i
+            current_peak_price = df.loc[i, 'Close']
+
+        elif not in_drawdown and df.loc[i, 'Close'] < current_peak_price * 0.95:
+            in_drawdown = True
+            drawdown_start_idx = current_peak_idx
+
+    return pd.DataFrame(major_drawdowns)
+
+
+def legacy_calculate_recovery(df, drawdowns_df):
+    """Original per-episode filtering implementation"""
+    recovery_analysis = []
+
+    for _, dd in drawdowns_df.iterrows():
+        trough_date = dd['Trough_Date']
+        peak_price = dd['Peak_Price']
+
+        recovery_data = df[df['Date'] > trough_date]
+        recovery = recovery_data[recovery_data['Close'] >= peak_price]
+
+        if not recovery.empty:
+            recovery_date = recovery.iloc[0]['Date']
+            recovery_days = (recovery_date - trough_date).days
+            recovery_analysis.append({
+                'Drawdown_Pct': dd['Drawdown_Pct'],
+                'Drawdown_Duration_Days': dd['Duration_Days'],
+                'Recovery_Days': recovery_days,
+                'Recovery_Months': round(recovery_days / 30.44, 1),
+                'Trough_Date': trough_date,
+                'Recovery_Date': recovery_date
+            })
+
+    return pd.DataFrame(recovery_analysis)
+
+
+def same_rows(expected, actual):
+    """Compare on the legacy columns, ignoring dtype differences and open episodes"""
+    actual = actual[actual['Status'] == 'Recovered'].reset_index(drop=True)
+    if len(expected) != len(actual):
+        return False
+    if len(expected) == 0:
+        return True
+    actual = actual[expected.columns].astype(expected.dtypes.to_dict())
+    return expected.equals(actual)
+
+
+def synthetic_prices(rows, seed=42):
+    """Geometric Brownian motion daily closes on a business-day calendar"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.012, rows)
+    close = 100 * np.exp(np.cumsum(returns))
+    dates = pd.bdate_range('1957-03-04', periods=rows)
+    return pd.DataFrame({'Date': dates, 'Close': close})
+
+
+def main(sizes):
+    print(f"{'Rows':>10} {'Episodes':>9} {'Legacy (s)':>11} {'Vectorized (s)':>15} {'Speed-up':>9}  Match")
+    for rows in sizes:
+        df = synthetic_prices(rows)
+        for threshold in (5, 10, 20):
+            start = time.perf_counter()
+            expected = legacy_find_major_drawdowns(df, threshold=threshold)
+            expected_recovery = legacy_calculate_recovery(df, expected)
+            legacy_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = find_major_drawdowns(df, threshold=threshold)
+            actual_recovery = calculate_recovery(df['Date'].to_numpy(), df['Close'].to_numpy(), threshold=threshold)
+            fast_time = time.perf_counter() - start
+
+            match = same_rows(expected, actual) and same_rows(expected_recovery, actual_recovery)
+            print(f"{rows:>10,} {len(actual):>9} {legacy_time:>11.4f} {fast_time:>15.4f} "
+                  f"{legacy_time / fast_time:>8.1f}x  {'yes' if match else 'NO'} (threshold={threshold}%)")
+            if not match:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 17_000, 100_000])
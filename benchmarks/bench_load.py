@@ -0,0 +1,139 @@
+"""
+Benchmark: dashboard request throughput against the number of worker processes.
+
+Each worker process stands in for one app replica behind a load balancer: it
+takes requests (a ticker and volatility windows) from one shared queue and
+serves them the way the app does - prices from the price store, then the
+result cache, running and rendering the analysis on a miss. All workers share
+the price store and, unless --no-shared, one SQLite result cache (as with
+STOCK_RAVA_SHARED_CACHE), so a result computed by one replica is a hit on
+every other. Prices come from FakeSource, so no network is needed.
+
+Every worker count starts from a cold result cache and the same request mix
+(popular tickers are requested more often). Throughput scales with workers
+up to the number of CPU cores; 'Computed' stays at the number of distinct
+requests with the shared cache and grows with the workers without it.
+Run with: python benchmarks/bench_load.py [--workers 1,2,4] [--requests N] [--no-shared]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rava_cache import ResultCache, make_key  # noqa: E402
+from rava_core import load_prices  # noqa: E402
+from rava_prefetch import FakeSource  # noqa: E402
+from rava_render import DASHBOARD_DEFAULTS, analyze_and_render  # noqa: E402
+from rava_store import PriceStore  # noqa: E402
+
+END_DATE = '2024-01-01'  # Fixed, so every run serves the same histories
+WINDOW_SETS = [(30, 60, 252), (20, 60), (10, 30, 90), (60, 120)]  # Sidebar settings users pick
+
+
+def workload(requests, tickers, variants, seed=7):
+    """Requests as (ticker, windows); ticker popularity falls off as 1/rank"""
+    rng = np.random.default_rng(seed)
+    names = [f"T{i:03d}" for i in range(tickers)]
+    popularity = 1 / np.arange(1, tickers + 1)
+    picks = rng.choice(tickers, size=requests, p=popularity / popularity.sum())
+    windows = rng.integers(0, variants, size=requests)
+    return [(names[t], WINDOW_SETS[w]) for t, w in zip(picks, windows)]
+
+
+def serve(store_root, shared_path, queue, results, start):
+    """One replica: serve requests from queue until it gets None, then report"""
+    store = PriceStore(store_root)
+    cache = ResultCache(spill_dir=None, shared_path=shared_path)
+    fetch = FakeSource(end=END_DATE)
+    warmup = fetch.history('WARMUP')[-500:]
+    analyze_and_render(warmup, 'WARMUP', fast_render=True, **DASHBOARD_DEFAULTS)  # A running replica is warm
+    start.wait()
+
+    latencies = []
+    while True:
+        request = queue.get()
+        if request is None:
+            break
+        began = time.perf_counter()
+        ticker, windows = request
+        data, resolved, error = load_prices(ticker, store=store, fetch=fetch)
+        if error:
+            raise RuntimeError(error)
+        params = dict(DASHBOARD_DEFAULTS, windows=windows)
+        key = make_key(resolved, data, fast_render=True, **params)
+        if cache.get(key) is None:
+            cache.put(key, analyze_and_render(data, resolved, fast_render=True, **params))
+        latencies.append(time.perf_counter() - began)
+    stats = cache.stats()
+    results.put({'latencies': latencies, 'computed': stats['misses'], 'shared_hits': stats['shared_hits'],
+                 'fetches': len(fetch.calls)})
+
+
+def run(workers, requests, store_root, shared_path):
+    """Serve requests with workers processes; returns (seconds, per-worker reports)"""
+    context = multiprocessing.get_context('spawn')
+    queue, results = context.Queue(), context.Queue()
+    for request in requests:
+        queue.put(request)
+    for _ in range(workers):
+        queue.put(None)
+    start = context.Barrier(workers + 1)
+    processes = [context.Process(target=serve, args=(store_root, shared_path, queue, results, start))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    start.wait()  # Every worker has imported, warmed up and opened its caches
+    began = time.perf_counter()
+    reports = [results.get() for _ in processes]
+    seconds = time.perf_counter() - began
+    for process in processes:
+        process.join()
+    return seconds, reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stock RAVA load test: throughput vs. worker processes')
+    parser.add_argument('--workers', default='1,2,4', help='Worker counts to compare (default: %(default)s)')
+    parser.add_argument('--requests', type=int, default=160, help='Requests per run (default: %(default)s)')
+    parser.add_argument('--tickers', type=int, default=8, help='Distinct tickers (default: %(default)s)')
+    parser.add_argument('--variants', type=int, default=2, choices=range(1, len(WINDOW_SETS) + 1),
+                        help='Volatility window settings per ticker (default: %(default)s)')
+    parser.add_argument('--no-shared', action='store_true', help='Give every worker only its own in-memory cache')
+    args = parser.parse_args(argv)
+
+    requests = workload(args.requests, args.tickers, args.variants)
+    root = tempfile.mkdtemp(prefix='rava_load_')
+    try:
+        store_root = os.path.join(root, 'store')
+        store, fetch = PriceStore(store_root), FakeSource(end=END_DATE)
+        for ticker in sorted({ticker for ticker, _ in requests}):
+            load_prices(ticker, store=store, fetch=fetch)
+
+        print(f"CPU cores: {os.cpu_count()}, requests: {len(requests)}, distinct: {len(set(requests))}, "
+              f"shared cache: {'no' if args.no_shared else 'yes'}")
+        print(f"{'Workers':>8} {'Seconds':>8} {'Req/s':>7} {'Speed-up':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+              f"{'Computed':>9} {'Shared hits':>12} {'Fetches':>8}")
+        baseline = None
+        for workers in [int(w) for w in args.workers.split(',') if w.strip()]:
+            shared_path = None if args.no_shared else os.path.join(root, f"shared_{workers}.sqlite")
+            seconds, reports = run(workers, requests, store_root, shared_path)
+            latencies = np.concatenate([report['latencies'] for report in reports]) * 1000
+            throughput = len(requests) / seconds
+            baseline = baseline or throughput
+            print(f"{workers:>8} {seconds:>8.2f} {throughput:>7.1f} {throughput / baseline:>8.2f}x "
+                  f"{np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 95):>9.1f} "
+                  f"{sum(r['computed'] for r in reports):>9} {sum(r['shared_hits'] for r in reports):>12} "
+                  f"{sum(r['fetches'] for r in reports):>8}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: memory per ticker of the columnar pipeline vs. the original DataFrame pipeline.
+
+Each measurement runs in a fresh subprocess on the same synthetic GBM history
+(sorted and de-duplicated, as the price store returns it) and reports the peak
+RSS growth while analyzing one ticker, the peak traced allocation and the
+memory kept afterwards for the analysis data (what the result cache holds),
+not counting price columns shared with the input.
+Run with: python benchmarks/bench_memory.py [rows ...]
+"""
+import gc
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rava_core import (calculate_recovery, calculate_risk_metrics, find_major_drawdowns,  # noqa: E402
+                       run_pipeline)
+
+MODES = ['legacy', 'float64', 'float32']
+
+
+def synthetic_prices(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, rows)))
+    spread = np.abs(rng.normal(0, 0.006, rows))
+    return pd.DataFrame({'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread),
+                         'Close': close, 'Volume': 1e6},
+                        index=pd.date_range('1957-03-04', periods=rows, freq='h', name='Date', unit='ns'))
+
+
+def legacy_pipeline(raw_data, ticker, threshold=20):
+    """Original pipeline: every cleaning step copies the DataFrame and all series are float64 columns"""
+    df = raw_data.reset_index()
+    df['Date'] = pd.to_datetime(df['Date'])
+    required_cols = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
+    df = df[required_cols].copy()
+    df = df.dropna(subset=['Close', 'Date'])
+    df['Volume'] = df['Volume'].fillna(0)
+    for col in ['Open', 'High', 'Low']:
+        df[col] = df[col].fillna(df['Close'])
+    df = df.drop_duplicates(subset='Date').reset_index(drop=True)
+    df = df.sort_values('Date').reset_index(drop=True)
+
+    df['Daily_Return'] = df['Close'].pct_change()
+    df = df.dropna().reset_index(drop=True)
+    for window in [30, 60, 252]:
+        df[f'Volatility_{window}d'] = df['Daily_Return'].rolling(window=window).std() * np.sqrt(252) * 100
+    df['Running_Max'] = df['Close'].expanding().max()
+    df['Drawdown'] = (df['Close'] / df['Running_Max'] - 1) * 100
+    df['Max_Drawdown'] = df['Drawdown'].expanding().min()
+
+    return {
+        'df': df,
+        'drawdowns': find_major_drawdowns(df, threshold=threshold),
+        'recovery': calculate_recovery(df['Date'], df['Close'], threshold=threshold),
+        'risk_metrics': calculate_risk_metrics(df, ticker)
+    }
+
+
+def analyze(mode, raw_data):
+    if mode == 'legacy':
+        return legacy_pipeline(raw_data, 'SYN')
+    return run_pipeline(raw_data, 'SYN', dtype=np.dtype(mode))
+
+
+def retained_bytes(results, raw_data):
+    df = results['df']
+    if isinstance(df, pd.DataFrame):
+        return int(df.memory_usage(deep=False).sum())
+    shared = [raw_data.index.asi8] + [raw_data[col].to_numpy() for col in raw_data.columns]
+    columns = [df.dates] + [df[name] for name in df.columns if name != 'Date']
+    own = sum(values.nbytes for values in columns if not any(np.shares_memory(values, s) for s in shared))
+    return own + results['volatility'][1].nbytes
+
+
+def measure(mode, path):
+    """Run in a child process: analyze the pickled prices once and report memory"""
+    with open(path, 'rb') as f:
+        raw_data = pickle.load(f)
+    analyze(mode, raw_data.iloc[:600])  # Warm up lazy imports and caches
+    gc.collect()
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results = analyze(mode, raw_data)
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+    retained = retained_bytes(results, raw_data)
+    del results
+    gc.collect()
+
+    tracemalloc.start()
+    analyze(mode, raw_data)
+    traced_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'rss': rss_kb * 1024, 'traced': traced_peak, 'retained': retained}
+
+
+def main(sizes):
+    print(f"{'Rows':>10} {'Pipeline':>9} {'Peak RSS +MB':>13} {'Peak alloc MB':>14} {'Kept MB':>8}")
+    for rows in sizes:
+        with tempfile.NamedTemporaryFile(suffix='.pkl', delete=False) as f:
+            pickle.dump(synthetic_prices(rows), f)
+        try:
+            for mode in MODES:
+                output = subprocess.run([sys.executable, __file__, '--child', mode, f.name],
+                                        check=True, capture_output=True, text=True).stdout
+                usage = json.loads(output)
+                print(f"{rows:>10,} {mode:>9} {usage['rss'] / 2**20:>13.1f} {usage['traced'] / 2**20:>14.1f} "
+                      f"{usage['retained'] / 2**20:>8.1f}")
+        finally:
+            os.unlink(f.name)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ['--child']:
+        print(json.dumps(measure(sys.argv[2], sys.argv[3])))
+    else:
+        main([int(arg) for arg in sys.argv[1:]] or [17_000, 100_000, 1_000_000])
@@ -0,0 +1,64 @@
+"""
+Benchmark: fast per-panel rendering vs. the full-resolution matplotlib dashboard.
+
+Renders synthetic GBM histories both ways (the full path as st.pyplot would,
+at 200 dpi) and reports render time and total PNG size.
+Run with: python benchmarks/bench_render.py [rows ...]
+"""
+import io
+import os
+import sys
+import time
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+matplotlib.use('Agg')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+from rava_core import create_dashboard, run_pipeline  # noqa: E402
+from rava_render import render_panels  # noqa: E402
+
+
+def synthetic_prices(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, rows)))
+    spread = np.abs(rng.normal(0, 0.006, rows))
+    return pd.DataFrame({'Open': close, 'High': close * (1 + spread), 'Low': close * (1 - spread),
+                         'Close': close, 'Volume': 1e6},
+                        index=pd.DatetimeIndex(pd.date_range('1957-03-04', periods=rows, freq='h'), name='Date'))
+
+
+def render_full(results):
+    fig = create_dashboard(results['df'], results['risk_metrics'], results['ticker'], results['recovery'],
+                           results['volatility'])
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=200, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def main(sizes):
+    print(f"{'Rows':>10} {'Full (s)':>9} {'Full (KB)':>10} {'Fast (s)':>9} {'Fast (KB)':>10} {'Speed-up':>9}")
+    for rows in sizes:
+        results = run_pipeline(synthetic_prices(rows), 'SYN')
+        render_full(results)  # Warm up font caches
+
+        start = time.perf_counter()
+        full_png = render_full(results)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        panels = render_panels(results['df'], results['recovery'], results['volatility'], 'SYN')
+        fast_time = time.perf_counter() - start
+        fast_size = sum(len(png) for png in panels.values())
+
+        print(f"{rows:>10,} {full_time:>9.3f} {len(full_png) / 1024:>10.0f} "
+              f"{fast_time:>9.3f} {fast_size / 1024:>10.0f} {full_time / fast_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [17_000, 100_000, 1_000_000])
@@ -0,0 +1,79 @@
+"""
+Benchmark: native NumPy risk metrics vs. the ffn + quantstats calls they replace.
+
+Checks calculate_return_metrics and calculate_drawdown against ffn/quantstats
+on synthetic GBM histories (both libraries must be installed for this script)
+and reports the speed-up.
+Run with: python benchmarks/bench_risk_metrics.py [rows ...]
+"""
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rava_core import RISK_FREE_RATE, calculate_drawdown, calculate_return_metrics  # noqa: E402
+
+warnings.filterwarnings('ignore')
+TOLERANCE = 1e-9
+
+
+def reference_metrics(prices, returns):
+    """Original ffn + quantstats implementation of calculate_risk_metrics"""
+    import ffn
+    import quantstats as qs
+
+    return {
+        'total_return': ffn.calc_stats(prices).total_return,
+        'cagr': qs.stats.cagr(returns),
+        'volatility': qs.stats.volatility(returns, periods=252),
+        'sharpe': qs.stats.sharpe(returns, rf=RISK_FREE_RATE, periods=252),
+        'sortino': qs.stats.sortino(returns, rf=RISK_FREE_RATE, periods=252),
+        'max_drawdown': qs.stats.max_drawdown(returns)
+    }
+
+
+def synthetic_returns(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.012, rows)
+    dates = pd.bdate_range('1957-03-04', periods=rows + 1)
+    # Prices include the base day so ffn's total return spans every return
+    prices = pd.Series(100 * np.concatenate([[1.0], np.cumprod(1 + returns)]), index=dates)
+    return prices, pd.Series(returns, index=dates[1:])
+
+
+def main(sizes):
+    import ffn
+
+    print(f"{'Rows':>10} {'ffn+qs (s)':>11} {'NumPy (s)':>10} {'Speed-up':>9}  Max rel. error")
+    for rows in sizes:
+        prices, returns = synthetic_returns(rows)
+
+        start = time.perf_counter()
+        expected = reference_metrics(prices, returns)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = calculate_return_metrics(returns.to_numpy(), rf=RISK_FREE_RATE, periods=252)
+        native_time = time.perf_counter() - start
+
+        errors = {key: abs(actual[key] - expected[key]) / max(abs(expected[key]), 1e-12) for key in expected}
+        worst = max(errors, key=errors.get)
+        print(f"{rows:>10,} {reference_time:>11.4f} {native_time:>10.5f} "
+              f"{reference_time / native_time:>8.0f}x  {errors[worst]:.2e} ({worst})")
+
+        df = pd.DataFrame({'Date': prices.index, 'Close': prices.to_numpy()})
+        df = calculate_drawdown(df)
+        dd_error = np.abs(df['Drawdown'].to_numpy() - ffn.to_drawdown_series(prices).to_numpy() * 100).max()
+
+        if errors[worst] > TOLERANCE or dd_error > TOLERANCE:
+            print(f"Mismatch: metrics {errors}, drawdown {dd_error:.2e}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1_000, 17_000, 100_000])
@@ -0,0 +1,239 @@
+"""
+Benchmark suite: every analysis stage, offline, with saved baselines and regression checks.
+
+Runs clean_data, calculate_returns, calculate_volatility, calculate_drawdown,
+find_major_drawdowns, calculate_recovery, calculate_risk_metrics,
+create_dashboard (drawn to PNG) and the whole run_pipeline over seeded
+synthetic GBM histories and over the histories in benchmarks/fixtures/
+(CSV, optionally gzipped, with Date and OHLCV columns). sample_daily.csv.gz,
+which ships with the repo, is a seeded synthetic history (ten years of daily bars
+with two major drawdowns, not market data); add real ones with --record.
+Each stage reports best-of-N wall time, throughput and peak traced memory.
+
+Usage:
+    python benchmarks/bench_suite.py                          # run, compare with the saved baseline
+    python benchmarks/bench_suite.py --save-baseline          # run and save as the baseline
+    python benchmarks/bench_suite.py --sizes 1000,10000000    # choose synthetic sizes
+    python benchmarks/bench_suite.py --record ^GSPC AAPL      # record fixture histories, then exit
+    python benchmarks/bench_suite.py --fixtures DIR           # read the fixture histories from DIR
+
+Exits with status 1 if any stage is slower (or uses more memory) than the
+baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+matplotlib.use('Agg')
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..'))
+
+import matplotlib.pyplot as plt  # noqa: E402
+
+from rava_core import (calculate_drawdown, calculate_recovery, calculate_returns,  # noqa: E402
+                       calculate_risk_metrics, calculate_volatility, clean_data, create_dashboard,
+                       find_major_drawdowns, load_prices, rolling_volatility, run_pipeline)
+
+FIXTURE_DIR = os.path.join(BENCH_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]  # Add 10_000_000 with --sizes
+DASHBOARD_MAX_ROWS = 1_000_000  # create_dashboard draws every point; skipped above this
+MIN_REPEAT_SECONDS = 0.5  # Repeat fast stages until at least this much time is measured
+MAX_REPEATS = 20
+TOLERANCE = 0.25  # Relative slowdown (or memory growth) flagged as a regression
+NOISE_FLOOR = 0.001  # Seconds; timing differences below this are never flagged
+ALL_WINDOWS = (10, 20, 30, 60, 90, 126, 252, 504)  # Every window and estimator the sidebar offers
+ALL_ESTIMATORS = ('close', 'parkinson', 'garman_klass')
+
+
+def synthetic_prices(rows, seed=42):
+    """Seeded GBM history with a High/Low range (minute bars, so 10M rows stay in the timestamp range)"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, rows)))
+    spread = np.abs(rng.normal(0, 0.006, rows))
+    return pd.DataFrame({'Open': close * (1 + rng.normal(0, 0.002, rows)), 'High': close * (1 + spread),
+                         'Low': close * (1 - spread), 'Close': close, 'Volume': 1e6},
+                        index=pd.date_range('1990-01-01', periods=rows, freq='min', name='Date', unit='ns'))
+
+
+def fixture_histories(directory=FIXTURE_DIR):
+    """{name: DataFrame} of the fixture histories in directory
+
+    The shipped sample_daily.csv.gz is synthetic; --record adds real ones.
+    """
+    histories = {}
+    paths = glob.glob(os.path.join(directory, '*.csv')) + glob.glob(os.path.join(directory, '*.csv.gz'))
+    for path in sorted(paths):
+        name = os.path.basename(path).split('.csv')[0]
+        histories[name] = pd.read_csv(path, parse_dates=['Date'], index_col='Date')
+    return histories
+
+
+def record_fixtures(tickers):
+    """Download (through the price store) and save each ticker's history as a fixture"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for ticker in tickers:
+        data, resolved, error = load_prices(ticker)
+        if error:
+            print(f"{ticker}: {error}", file=sys.stderr)
+            continue
+        path = os.path.join(FIXTURE_DIR, f"{resolved.replace('^', '').replace('/', '_')}.csv.gz")
+        data.to_csv(path)
+        print(f"{resolved}: {len(data):,} rows -> {path}")
+
+
+def stages(raw_data):
+    """[(stage name, rows, callable, setup)] for one history
+
+    Each stage takes the input it gets in the pipeline, prepared by running
+    the stages before it once. Stages such as calculate_returns add columns
+    to their input in place, so setup() hands every call a fresh copy (as
+    the callable's arguments), made outside the timing.
+    """
+    cleaned = clean_data(raw_data)
+    df = calculate_drawdown(calculate_returns(clean_data(raw_data)))
+    results = run_pipeline(raw_data, 'BENCH')
+
+    def raw():
+        return (raw_data.copy(),)
+
+    def fresh(frame):
+        return lambda: (frame.copy(),)
+
+    def dashboard(frame):
+        fig = create_dashboard(frame, results['risk_metrics'], 'BENCH', results['recovery'], results['volatility'])
+        fig.savefig(os.devnull, format='png', dpi=100)
+        plt.close(fig)
+
+    plan = [
+        ('clean_data', len(raw_data), clean_data, raw),
+        ('calculate_returns', len(cleaned), calculate_returns, fresh(cleaned)),
+        ('calculate_volatility', len(df), calculate_volatility, fresh(df)),
+        ('rolling_volatility_all', len(df), lambda frame: rolling_volatility(frame, ALL_WINDOWS, ALL_ESTIMATORS),
+         fresh(df)),
+        ('calculate_drawdown', len(df), calculate_drawdown, fresh(df)),
+        ('find_major_drawdowns', len(df), find_major_drawdowns, fresh(df)),
+        ('calculate_recovery', len(df), calculate_recovery,
+         lambda: (df['Date'].copy(), df['Close'].copy(), df['Running_Max'].copy())),
+        ('calculate_risk_metrics', len(df), lambda frame: calculate_risk_metrics(frame, 'BENCH'), fresh(df)),
+        ('run_pipeline', len(raw_data), lambda frame: run_pipeline(frame, 'BENCH'), raw)
+    ]
+    if len(df) <= DASHBOARD_MAX_ROWS:
+        plan.append(('create_dashboard', len(df), dashboard, fresh(df)))
+    return plan
+
+
+def measure(func, setup):
+    """(best wall time in seconds, repeats, peak traced bytes) for func(*setup()), setup() untimed"""
+    func(*setup())  # Warm up
+    times = []
+    while len(times) < MAX_REPEATS and (not times or sum(times) < MIN_REPEAT_SECONDS):
+        args = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+        del args
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), len(times), peak
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def run(datasets):
+    """Benchmark every stage of every dataset; returns {'dataset/stage': result}"""
+    results = {}
+    print(f"{'Dataset':>14} {'Stage':<24} {'Rows':>11} {'Best (s)':>10} {'Rows/s':>12} {'Peak MB':>9} {'N':>3}")
+    for name, raw_data in datasets.items():
+        for stage, rows, func, setup in stages(raw_data):
+            seconds, repeats, peak = measure(func, setup)
+            results[f"{name}/{stage}"] = {'rows': rows, 'seconds': seconds, 'peak_bytes': peak}
+            print(f"{name:>14} {stage:<24} {rows:>11,} {seconds:>10.5f} {rows / seconds:>12,.0f} "
+                  f"{peak / 2**20:>9.1f} {repeats:>3}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print regressions against the baseline; returns the number found"""
+    regressions = 0
+    for key, result in results.items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        slower = result['seconds'] > base['seconds'] * (1 + tolerance) and \
+            result['seconds'] - base['seconds'] > NOISE_FLOOR
+        larger = result['peak_bytes'] > base['peak_bytes'] * (1 + tolerance) and \
+            result['peak_bytes'] - base['peak_bytes'] > 2**20
+        if slower or larger:
+            regressions += 1
+            print(f"REGRESSION {key}: {base['seconds']:.5f}s -> {result['seconds']:.5f}s, "
+                  f"{base['peak_bytes'] / 2**20:.1f} MB -> {result['peak_bytes'] / 2**20:.1f} MB")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stock RAVA benchmark suite')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Synthetic history sizes in rows (default: %(default)s)')
+    parser.add_argument('--fixtures', default=FIXTURE_DIR, help='Fixture history directory (default: %(default)s)')
+    parser.add_argument('--no-fixtures', action='store_true', help='Skip the fixture histories')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='Baseline file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='Save this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help='Relative slowdown flagged as a regression (default: %(default)s)')
+    parser.add_argument('--record', nargs='+', metavar='TICKER', help='Record fixture histories and exit')
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record_fixtures(args.record)
+        return 0
+
+    datasets = {f"gbm_{int(size):,}".replace(',', '_'): synthetic_prices(int(size))
+                for size in args.sizes.split(',') if size.strip()}
+    if not args.no_fixtures:
+        datasets.update(fixture_histories(args.fixtures))
+    print(f"Environment: {environment()}")
+    results = run(datasets)
+
+    regressions = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline['environment'] != environment():
+            print(f"Note: baseline was recorded on {baseline['environment']}")
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"{regressions} regression(s) against {args.baseline}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""
+Benchmark: shared cumulative-sum rolling volatility vs. one pandas rolling().std() per window.
+
+Checks rolling_volatility against pandas on synthetic GBM returns and reports
+the timing for the default windows plus a wider set of windows.
+Run with: python benchmarks/bench_volatility.py [rows ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rava_core import rolling_volatility  # noqa: E402
+
+TOLERANCE = 1e-6  # Relative; float64 cumulative sums lose a few digits on very long histories
+WINDOW_SETS = [(30, 60, 252), (5, 10, 20, 30, 60, 90, 126, 252, 504)]
+
+
+def pandas_volatility(df, windows):
+    """Original per-window pandas implementation of calculate_volatility"""
+    return np.column_stack([
+        df['Daily_Return'].rolling(window=window).std().to_numpy() * np.sqrt(252) * 100
+        for window in windows
+    ])
+
+
+def synthetic_returns(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Daily_Return': rng.normal(0.0003, 0.012, rows)})
+
+
+def main(sizes):
+    print(f"{'Rows':>10} {'Windows':>8} {'pandas (s)':>11} {'cumsum (s)':>11} {'Speed-up':>9}  Max rel. error")
+    for rows in sizes:
+        df = synthetic_returns(rows)
+        for windows in WINDOW_SETS:
+            start = time.perf_counter()
+            expected = pandas_volatility(df, windows)
+            pandas_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, actual = rolling_volatility(df, windows)
+            engine_time = time.perf_counter() - start
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                error = np.nanmax(np.abs(actual - expected) / expected) if rows > max(windows) else 0.0
+            print(f"{rows:>10,} {len(windows):>8} {pandas_time:>11.4f} {engine_time:>11.4f} "
+                  f"{pandas_time / engine_time:>8.1f}x  {error:.2e}")
+            if error > TOLERANCE:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [17_000, 1_000_000])
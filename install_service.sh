@@ -1,6 +1,7 @@
 #!/bin/bash
 # Script to install Stock RAVA as a systemd user service
-# Usage: ./install_service.sh
+# Usage: ./install_service.sh [--workers N]
+#   --workers N   run N dashboard workers (ports 8501..) sharing one result cache
 
 set -e
 
@@ -8,6 +9,13 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$SCRIPT_DIR"
 SERVICE_FILE="$SCRIPT_DIR/stock-rava.service"
 SERVICE_NAME="stock-rava.service"
+PREFETCH_SERVICE_NAME="stock-rava-prefetch.service"
+PREFETCH_TIMER_NAME="stock-rava-prefetch.timer"
+RESULT_CACHE_DIR="$PROJECT_ROOT/result_cache"
+WORKER_TEMPLATE_NAME="stock-rava@.service"
+SHARED_CACHE_PATH="$RESULT_CACHE_DIR/shared.sqlite"
+FIRST_PORT=8501
+WORKERS=1
 
 # Colors
 GREEN='\033[0;32m'
@@ -16,6 +24,18 @@ RED='\033[0;31m'
 CYAN='\033[0;36m'
 NC='\033[0m'
 
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --workers) WORKERS="$2"; shift 2 ;;
+        --workers=*) WORKERS="${1#*=}"; shift ;;
+        *) echo -e "${RED}✗ Unknown option: $1${NC}"; echo "Usage: $0 [--workers N]"; exit 1 ;;
+    esac
+done
+if ! [[ "$WORKERS" =~ ^[1-9][0-9]*$ ]]; then
+    echo -e "${RED}✗ --workers needs a positive number${NC}"
+    exit 1
+fi
+
 echo -e "${CYAN}Installing Stock RAVA as systemd user service...${NC}"
 echo ""
 
@@ -57,6 +77,71 @@ else
     echo -e "${GREEN}✓ Using system Python (system-wide installation)${NC}"
 fi
 
+# Enabled worker instances (stock-rava@PORT.service) of an earlier --workers install
+installed_workers() {
+    for link in "$USER_SERVICE_DIR"/*.wants/stock-rava@*.service; do
+        [ -L "$link" ] && basename "$link"
+    done | sort -u
+}
+
+if [ "$WORKERS" -gt 1 ]; then
+# Several workers: one templated unit, an instance per port, all sharing one result cache
+echo -e "${CYAN}Creating worker service template ($WORKERS workers)...${NC}"
+if [ -f "$USER_SERVICE_DIR/$SERVICE_NAME" ]; then
+    systemctl --user disable --now "$SERVICE_NAME" 2>/dev/null || true
+    rm -f "${USER_SERVICE_DIR:?}/${SERVICE_NAME:?}"
+fi
+# Upstream limits apply per process: split the single-instance budget (4 downloads, 2/s)
+FETCH_CONCURRENCY=$(( (4 + WORKERS - 1) / WORKERS ))
+FETCH_RATE=$(awk "BEGIN { printf \"%.2f\", 2.0 / $WORKERS }")
+cat > "$USER_SERVICE_DIR/$WORKER_TEMPLATE_NAME" << EOF
+[Unit]
+Description=Stock RAVA - Dashboard worker on port %i
+After=network.target
+
+[Service]
+Type=simple
+WorkingDirectory=$PROJECT_ROOT
+Environment="PATH=$VENV_PATH$HOME/.local/bin:/usr/local/bin:/usr/bin:/bin"
+Environment="STOCK_RAVA_RESULT_CACHE=$RESULT_CACHE_DIR"
+Environment="STOCK_RAVA_SHARED_CACHE=$SHARED_CACHE_PATH"
+Environment="STOCK_RAVA_RESULT_CACHE_MB=64"
+Environment="STOCK_RAVA_FETCH_CONCURRENCY=$FETCH_CONCURRENCY"
+Environment="STOCK_RAVA_FETCH_RATE=$FETCH_RATE"
+ExecStart=$PYTHON_CMD -m streamlit run $PROJECT_ROOT/Stock_RAVA.py --server.headless true --server.port %i
+Restart=always
+RestartSec=10
+StandardOutput=journal
+StandardError=journal
+SyslogIdentifier=stock-rava-%i
+
+# Security settings
+NoNewPrivileges=true
+PrivateTmp=true
+
+[Install]
+WantedBy=default.target
+EOF
+for unit in $(installed_workers); do
+    systemctl --user disable --now "$unit" 2>/dev/null || true
+done
+UNITS=""
+for i in $(seq 0 $((WORKERS - 1))); do
+    UNITS="$UNITS stock-rava@$((FIRST_PORT + i)).service"
+done
+UNITS="${UNITS# }"
+PREFETCH_CACHE_ENV="Environment=\"STOCK_RAVA_SHARED_CACHE=$SHARED_CACHE_PATH\""
+
+echo -e "${GREEN}✓ Worker template created at: $USER_SERVICE_DIR/$WORKER_TEMPLATE_NAME${NC}"
+echo -e "${GREEN}✓ Workers: $UNITS${NC}"
+else
+for unit in $(installed_workers); do
+    systemctl --user disable --now "$unit" 2>/dev/null || true
+done
+rm -f "${USER_SERVICE_DIR:?}/${WORKER_TEMPLATE_NAME:?}"
+UNITS="$SERVICE_NAME"
+PREFETCH_CACHE_ENV=""
+
 # Create service file with actual paths
 echo -e "${CYAN}Creating service file...${NC}"
 cat > "$USER_SERVICE_DIR/$SERVICE_NAME" << EOF
@@ -68,6 +153,7 @@ After=network.target
 Type=simple
 WorkingDirectory=$PROJECT_ROOT
 Environment="PATH=$VENV_PATH$HOME/.local/bin:/usr/local/bin:/usr/bin:/bin"
+Environment="STOCK_RAVA_RESULT_CACHE=$RESULT_CACHE_DIR"
 ExecStart=$PYTHON_CMD -m streamlit run $PROJECT_ROOT/Stock_RAVA.py --server.headless true --server.port 8501
 Restart=always
 RestartSec=10
@@ -84,6 +170,34 @@ WantedBy=default.target
 EOF
 
 echo -e "${GREEN}✓ Service file created at: $USER_SERVICE_DIR/$SERVICE_NAME${NC}"
+fi
+
+# Create the prefetch job and its timer (keeps hot tickers warm)
+echo -e "${CYAN}Creating prefetch timer...${NC}"
+cat > "$USER_SERVICE_DIR/$PREFETCH_SERVICE_NAME" << EOF
+[Unit]
+Description=Stock RAVA - Pre-warm prices and results for hot tickers
+After=network-online.target
+Wants=network-online.target
+
+[Service]
+Type=oneshot
+WorkingDirectory=$PROJECT_ROOT
+Environment="PATH=$VENV_PATH$HOME/.local/bin:/usr/local/bin:/usr/bin:/bin"
+Environment="STOCK_RAVA_RESULT_CACHE=$RESULT_CACHE_DIR"
+$PREFETCH_CACHE_ENV
+ExecStart=$PYTHON_CMD -m rava_prefetch
+StandardOutput=journal
+StandardError=journal
+SyslogIdentifier=stock-rava-prefetch
+
+# Security settings
+NoNewPrivileges=true
+PrivateTmp=true
+EOF
+cp "$SCRIPT_DIR/$PREFETCH_TIMER_NAME" "$USER_SERVICE_DIR/$PREFETCH_TIMER_NAME"
+
+echo -e "${GREEN}✓ Prefetch timer created at: $USER_SERVICE_DIR/$PREFETCH_TIMER_NAME${NC}"
 
 # Reload systemd
 echo -e "${CYAN}Reloading systemd...${NC}"
@@ -92,31 +206,43 @@ echo -e "${GREEN}✓ Systemd reloaded${NC}"
 
 # Enable service (start on login)
 echo -e "${CYAN}Enabling service (auto-start on login)...${NC}"
-systemctl --user enable "$SERVICE_NAME"
+# shellcheck disable=SC2086
+systemctl --user enable $UNITS
 echo -e "${GREEN}✓ Service enabled${NC}"
+systemctl --user enable --now "$PREFETCH_TIMER_NAME"
+echo -e "${GREEN}✓ Prefetch timer enabled${NC}"
 
 # Ask if user wants to start now
 echo ""
 read -p "Start the service now? (y/n) " -n 1 -r
 echo
 if [[ $REPLY =~ ^[Yy]$ ]]; then
-    systemctl --user start "$SERVICE_NAME"
+    # shellcheck disable=SC2086
+    systemctl --user start $UNITS
     echo -e "${GREEN}✓ Service started${NC}"
     
     # Wait a moment and check status
     sleep 2
-    systemctl --user status "$SERVICE_NAME" --no-pager || true
+    # shellcheck disable=SC2086
+    systemctl --user status $UNITS --no-pager || true
 fi
 
 echo ""
 echo -e "${GREEN}✓ Installation complete!${NC}"
 echo ""
 echo -e "${CYAN}Useful commands:${NC}"
-echo "  Start service:   systemctl --user start $SERVICE_NAME"
-echo "  Stop service:    systemctl --user stop $SERVICE_NAME"
-echo "  Status:          systemctl --user status $SERVICE_NAME"
-echo "  View logs:       journalctl --user -u $SERVICE_NAME -f"
-echo "  Disable:         systemctl --user disable $SERVICE_NAME"
+echo "  Start service:   systemctl --user start $UNITS"
+echo "  Stop service:    systemctl --user stop $UNITS"
+echo "  Status:          systemctl --user status $UNITS"
+echo "  View logs:       journalctl --user -u '${UNITS%%@*}*' -f"
+echo "  Disable:         systemctl --user disable $UNITS"
+echo "  Prefetch now:    systemctl --user start $PREFETCH_SERVICE_NAME"
+echo "  Prefetch logs:   journalctl --user -u $PREFETCH_SERVICE_NAME"
 echo ""
+if [ "$WORKERS" -gt 1 ]; then
+    echo -e "${YELLOW}Put a reverse proxy with sticky sessions in front of ports $FIRST_PORT-$((FIRST_PORT + WORKERS - 1))${NC}"
+    echo "  (see \"Multiple Workers\" in README_LINUX.md)"
+    echo ""
+fi
 echo -e "${CYAN}The service will automatically start on login.${NC}"
 
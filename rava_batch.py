@@ -0,0 +1,135 @@
+"""
+Stock RAVA - Batch analysis
+Runs the single-ticker pipeline over a watchlist: prices are fetched through
+the on-disk store with a bounded thread pool, and the per-ticker metrics are
+computed in a process pool. Returns a ranked comparison table.
+
+With export_dir every worker also writes its ticker's analysis data and
+drawdown/recovery tables into one partitioned dataset (see rava_export), and
+the comparison table is written next to it as the summary.
+
+Usage:
+    from rava_batch import batch_analyze
+    table, errors = batch_analyze(['AAPL', 'MSFT', '^GSPC'])
+    table, errors = batch_analyze(['AAPL', 'MSFT'], export_dir='dataset/')
+"""
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from rava_core import load_prices, run_pipeline
+from rava_export import write_partitions, write_summary
+from rava_store import PriceStore
+
+DOWNLOAD_WORKERS = 8  # Concurrent upstream downloads
+RANK_COLUMNS = ['CAGR', 'Volatility', 'Sharpe', 'Sortino', 'Max_Drawdown']
+# Metric workers start from a fresh interpreter: forking the app, which runs
+# threads (Streamlit's server, the download pool), can deadlock the child
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def parse_tickers(text):
+    """Split a comma/whitespace separated watchlist into unique upper-case tickers"""
+    tickers = []
+    for ticker in re.split(r'[\s,;]+', text or ''):
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+def fetch_many(tickers, fetch=None, store=None, max_workers=DOWNLOAD_WORKERS, interval='1d'):
+    """Load or refresh price history for many tickers with a bounded thread pool
+
+    Returns ({ticker: DataFrame}, {ticker: error message}). Tickers are
+    resolved as in load_prices, including the '^' fallback.
+    """
+    store = store or PriceStore()
+
+    prices, errors = {}, {}
+    if not tickers:
+        return prices, errors
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        futures = {ticker: pool.submit(load_prices, ticker, store=store, fetch=fetch, interval=interval) for ticker in tickers}
+        for ticker, future in futures.items():
+            data, _, error = future.result()
+            if error:
+                errors[ticker] = error
+            else:
+                prices[ticker] = data
+    return prices, errors
+
+
+def analyze_prices(ticker, raw_data, threshold=20, export_dir=None, export_format='parquet'):
+    """Run the full metric pipeline on one ticker's raw prices and return a summary row
+
+    With export_dir the results are also written as the ticker's partition of
+    the dataset there.
+    """
+    results = run_pipeline(raw_data, ticker, threshold=threshold, dtype=np.float32)
+    if export_dir:
+        write_partitions(results, export_dir, fmt=export_format)
+    df, drawdowns_df, risk_metrics = results['df'], results['drawdowns'], results['risk_metrics']
+    return {
+        'Ticker': ticker,
+        'CAGR': risk_metrics['cagr'],
+        'Volatility': risk_metrics['volatility'],
+        'Sharpe': risk_metrics['sharpe'],
+        'Sortino': risk_metrics['sortino'],
+        'Max_Drawdown': risk_metrics['max_drawdown'],
+        'Total_Return': risk_metrics['total_return'],
+        'Years': risk_metrics['years'],
+        'Major_Drawdowns': len(drawdowns_df),
+        'Start_Date': df['Date'][0],
+        'End_Date': df['Date'][-1]
+    }
+
+
+def _analyze_task(args):
+    ticker, raw_data, threshold, export_dir, export_format = args
+    try:
+        return analyze_prices(ticker, raw_data, threshold, export_dir, export_format), None
+    except Exception as e:
+        return {'Ticker': ticker}, f"Error analyzing data: {e}"
+
+
+def batch_analyze(tickers, threshold=20, sort_by='Sharpe', fetch=None, store=None,
+                  max_workers=None, download_workers=DOWNLOAD_WORKERS, export_dir=None, export_format='parquet'):
+    """Analyze a list of tickers and return (ranked comparison DataFrame, {ticker: error})
+
+    max_workers bounds the metric process pool (default: CPU count); use 1 to
+    compute inline. Rows are ranked by sort_by, best first (least negative
+    for Max_Drawdown). With export_dir the per-ticker results and the table
+    are written there as one partitioned dataset in export_format.
+    """
+    tickers = parse_tickers(','.join(tickers)) if not isinstance(tickers, str) else parse_tickers(tickers)
+    prices, errors = fetch_many(tickers, fetch=fetch, store=store, max_workers=download_workers)
+
+    tasks = [(ticker, prices[ticker], threshold, export_dir, export_format) for ticker in tickers if ticker in prices]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(tasks) <= 1:
+        results = [_analyze_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                                 mp_context=multiprocessing.get_context(POOL_START_METHOD)) as pool:
+            results = list(pool.map(_analyze_task, tasks))
+
+    rows = []
+    for row, error in results:
+        if error:
+            errors[row['Ticker']] = error
+        else:
+            rows.append(row)
+
+    table = pd.DataFrame(rows, columns=['Ticker'] + RANK_COLUMNS + [
+        'Total_Return', 'Years', 'Major_Drawdowns', 'Start_Date', 'End_Date'])
+    if len(table) > 0 and sort_by in table.columns:
+        table = table.sort_values(sort_by, ascending=sort_by == 'Volatility').reset_index(drop=True)
+        table.insert(0, 'Rank', range(1, len(table) + 1))
+    if export_dir:
+        write_summary(table, export_dir, fmt=export_format)
+    return table, errors
@@ -0,0 +1,325 @@
+"""
+Stock RAVA - Analysis result cache
+Bounded in-memory LRU for computed analysis results (frames, metrics and
+rendered figure bytes), keyed by resolved ticker, bar range and analysis
+parameters. Entries evicted from memory can optionally be spilled to disk and
+are loaded back on the next request. Hit/miss counters show how well it works.
+
+The spill directory doubles as a hand-off between processes: the prefetcher
+save()s results there and the dashboard loads them on its first lookup.
+
+With several app processes (replicas) a SharedCache - one SQLite database in
+WAL mode, read through a memory map - is the second tier instead: every
+computed result is written through to it, so whichever replica a user lands
+on serves results any other replica (or the prefetcher) computed. Keys are
+plain tuples of strings and numbers (including a digest of the closes, so a
+rewritten or re-adjusted history gets a new key) and are hashed with SHA-1,
+never with hash(), so every process derives the same key for the same request.
+"""
+import glob
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from rava_frame import AnalysisFrame
+
+RESULT_CACHE_ENTRIES = 64  # Maximum results kept in memory
+RESULT_CACHE_BYTES = int(os.environ.get('STOCK_RAVA_RESULT_CACHE_MB', 256)) * 1024 * 1024  # Approximate memory budget for cached results
+RESULT_CACHE_DIR = os.environ.get('STOCK_RAVA_RESULT_CACHE')  # Disk spill directory (disabled if unset)
+SHARED_CACHE_PATH = os.environ.get('STOCK_RAVA_SHARED_CACHE')  # SQLite file shared by all replicas (disabled if unset)
+SHARED_CACHE_BYTES = 2 * 1024 * 1024 * 1024  # Size limit of the shared cache; oldest results are dropped first
+SHARED_CACHE_MMAP = 256 * 1024 * 1024  # Bytes of the database read through a memory map (shared page cache)
+SHARED_CACHE_TIMEOUT = 10.0  # Seconds to wait for another process's write to finish
+
+
+def make_key(ticker, data, **params):
+    """Cache key for analyzing data (Date-indexed prices) of ticker with params
+
+    The first/last bar dates, row count and a hash of the closes identify
+    the price history, so a refreshed history gets a new key - with a new
+    bar, a rewritten (partial) last bar, or closes re-adjusted for a split
+    or dividend.
+    """
+    index = data.index
+    bars = (str(index[0]), str(index[-1]), len(index)) if len(index) else (None, None, 0)
+    bars += (_closes_digest(data),)
+    normalized = tuple(sorted((name, tuple(value) if isinstance(value, (list, tuple)) else value)
+                              for name, value in params.items()))
+    return (ticker.upper(),) + bars + normalized
+
+
+def _closes_digest(data):
+    close = 'Adj Close' if 'Adj Close' in data.columns else 'Close'
+    if close not in data.columns:
+        return None
+    values = np.ascontiguousarray(data[close].to_numpy(dtype=np.float64))
+    return hashlib.sha1(values.view(np.uint8)).hexdigest()
+
+
+def key_digest(key):
+    """Stable (cross-process) hex digest of a cache key"""
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def sizeof(value):
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=False).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=False))
+    if isinstance(value, (np.ndarray, AnalysisFrame)):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    return 64
+
+
+class SharedCache:
+    """Pickled results in one SQLite database that any number of processes read and write
+
+    Each thread (and each forked process) opens its own connection. Writes
+    are atomic; readers never block writers (WAL journal). Once the stored
+    results exceed max_bytes the oldest are deleted. Database errors are
+    treated as misses or failed writes, never raised.
+    """
+
+    def __init__(self, path=SHARED_CACHE_PATH, max_bytes=SHARED_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=SHARED_CACHE_TIMEOUT, isolation_level=None)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute(f'PRAGMA mmap_size={SHARED_CACHE_MMAP}')
+        connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                           'digest TEXT PRIMARY KEY, key TEXT NOT NULL, value BLOB NOT NULL, '
+                           'size INTEGER NOT NULL, created REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS results_created ON results (created)')
+        self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def get(self, key):
+        """Return the stored value for key, or None"""
+        try:
+            row = self._connect().execute('SELECT key, value FROM results WHERE digest = ?',
+                                          (key_digest(key),)).fetchone()
+            if row is None or row[0] != repr(key):
+                return None
+            return pickle.loads(row[1])
+        except (sqlite3.Error, OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def put(self, key, value):
+        """Store value under key, replacing any previous value; returns False if the write failed"""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            connection = self._connect()
+            connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                               (key_digest(key), repr(key), blob, len(blob), time.time()))
+            self._trim(connection)
+            return True
+        except (sqlite3.Error, OSError, pickle.PicklingError):
+            return False
+
+    def _trim(self, connection):
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            for digest, size in connection.execute('SELECT digest, size FROM results ORDER BY created').fetchall():
+                if excess <= 0:
+                    break
+                connection.execute('DELETE FROM results WHERE digest = ?', (digest,))
+                excess -= size
+
+    def prune(self, max_age):
+        """Delete results written more than max_age seconds ago; returns how many were deleted"""
+        try:
+            return self._connect().execute('DELETE FROM results WHERE created < ?',
+                                           (time.time() - max_age,)).rowcount
+        except sqlite3.Error:
+            return 0
+
+    def clear(self):
+        try:
+            self._connect().execute('DELETE FROM results')
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        """Stored results and their total size in bytes"""
+        try:
+            entries, size = self._connect().execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        except sqlite3.Error:
+            entries, size = 0, 0
+        return {'entries': entries, 'bytes': size}
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results with optional disk spill or shared second tier"""
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, max_bytes=RESULT_CACHE_BYTES, spill_dir=RESULT_CACHE_DIR,
+                 shared_path=SHARED_CACHE_PATH):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.shared = SharedCache(shared_path) if shared_path else None
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, key_digest(key) + '.pkl')
+
+    def get(self, key):
+        """Return the cached value for key, or None (counted as a miss)
+
+        Looks in memory, then in the shared cache, then in the spill directory.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                self.put(key, value, spill=False)
+                return value
+
+        value = self._load_spilled(key)
+        if value is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self.put(key, value, spill=False)
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value, spill=True):
+        """Store value under key, evicting least recently used entries over budget
+
+        With spill (for a newly computed value) the value is also written
+        through to the shared cache if there is one; otherwise evicted
+        entries are written to the spill directory.
+        """
+        size = sizeof(value)
+        evicted = []
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+                evicted.append((old_key, old_value))
+        if spill and self.shared is not None:
+            self.shared.put(key, value)
+        elif spill:
+            for old_key, old_value in evicted:
+                self._spill(old_key, old_value)
+
+    def save(self, key, value):
+        """Write value to the shared cache, else the spill directory, where any process using it can load it
+
+        Returns False if neither is configured or the write failed.
+        """
+        if self.shared is not None:
+            return self.shared.put(key, value)
+        return self._spill(key, value)
+
+    def prune(self, max_age):
+        """Delete shared and spilled results not written for max_age seconds; returns how many were deleted"""
+        deleted = self.shared.prune(max_age) if self.shared is not None else 0
+        if not self.spill_dir:
+            return deleted
+        cutoff = time.time() - max_age
+        for path in glob.glob(os.path.join(self.spill_dir, '*.pkl')):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    deleted += 1
+            except OSError:
+                pass
+        return deleted
+
+    def _spill(self, key, value):
+        if not self.spill_dir:
+            return False
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            path = self._spill_path(key)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            return False
+
+    def _load_spilled(self, key):
+        if not self.spill_dir:
+            return None
+        try:
+            with open(self._spill_path(key), 'rb') as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return value if stored_key == key else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.shared_hits + self.disk_hits) / lookups if lookups else 0.0
+            }
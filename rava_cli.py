@@ -0,0 +1,233 @@
+"""
+Stock RAVA - Command line interface
+Runs the analysis pipeline without Streamlit, for cron jobs and batch scripts.
+
+Usage:
+    python -m rava_cli ^GSPC AAPL                    # metrics as JSON on stdout
+    python -m rava_cli prices.csv --format csv -o metrics.csv
+    python -m rava_cli MSFT --tables out/            # also write the analysis tables
+    python -m rava_cli AAPL --interval 5m            # intraday bars
+    python -m rava_cli ticks.csv --interval 1m --chunk-rows 500000   # bounded memory
+    python -m rava_cli AAPL:0.6 MSFT:0.4 --portfolio --tables out/   # one weighted basket
+    python -m rava_cli ^GSPC --tail --seed 7 --tables out/         # VaR/CVaR and simulated drawdowns
+    python -m rava_cli MSFT --tables out/ --export-format parquet  # Parquet instead of CSV tables
+    python -m rava_cli AAPL MSFT ^GSPC --dataset ds/               # one partitioned Parquet dataset
+
+Each input is a ticker or a local CSV/Parquet file with Date and OHLCV
+columns (a file's name is used as its ticker). With --chunk-rows the history
+is streamed through the incremental analyzer that many rows at a time; only
+the metrics and drawdown tables are produced, not the per-bar data. With
+--portfolio the inputs are the holdings (TICKER:weight) of one basket.
+With --dataset every input's results go into one partitioned dataset (see
+rava_export) and the metrics table is written next to them as the summary.
+"""
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from rava_core import (INTERVAL_PERIODS, VOLATILITY_ESTIMATORS, VOLATILITY_WINDOWS, iter_prices, load_prices,
+                       run_pipeline)
+from rava_export import EXPORT_FORMATS, export_results, write_partitions, write_summary
+from rava_portfolio import matrix_frame, portfolio_analyze
+from rava_tail import analyze_tail
+from rava_stream import analyze_stream
+from rava_timing import configure_logging, trace
+
+FILE_EXTENSIONS = ('.csv', '.parquet', '.pq')
+
+
+def read_price_file(path):
+    """Read a local CSV or Parquet price file"""
+    if path.lower().endswith(('.parquet', '.pq')):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def iter_price_file(path, rows):
+    """Read a local CSV or Parquet price file rows at a time"""
+    if path.lower().endswith(('.parquet', '.pq')):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=rows)
+
+
+def _since(raw_data, start_date):
+    if start_date and 'Date' in raw_data.columns:
+        return raw_data[pd.to_datetime(raw_data['Date']) >= start_date]
+    return raw_data
+
+
+def analyze_input(source, threshold=20, start_date=None, interval='1d', **pipeline_options):
+    """Analyze one ticker or price file; returns run_pipeline results"""
+    if source.lower().endswith(FILE_EXTENSIONS) and os.path.exists(source):
+        raw_data = _since(read_price_file(source), start_date)
+        ticker = os.path.splitext(os.path.basename(source))[0]
+    else:
+        raw_data, ticker, error = load_prices(source, start_date=start_date, interval=interval)
+        if error:
+            raise ValueError(error)
+    return run_pipeline(raw_data, ticker, threshold=threshold, interval=interval, **pipeline_options)
+
+
+def stream_input(source, rows, threshold=20, start_date=None, interval='1d', windows=VOLATILITY_WINDOWS):
+    """Analyze one ticker or price file rows at a time; returns analyze_stream results"""
+    if source.lower().endswith(FILE_EXTENSIONS) and os.path.exists(source):
+        chunks = (_since(chunk, start_date) for chunk in iter_price_file(source, rows))
+        ticker = os.path.splitext(os.path.basename(source))[0]
+    else:
+        chunks, ticker, error = iter_prices(source, start_date=start_date, interval=interval, rows=rows)
+        if error:
+            raise ValueError(error)
+    return analyze_stream(chunks, ticker, threshold=threshold, windows=windows, interval=interval)
+
+
+def metrics_row(results):
+    """Flatten the pipeline (or analyze_stream) results into one JSON/CSV friendly record"""
+    if 'analyzer' in results:
+        analyzer = results['analyzer']
+        first_date, last_date, bars = analyzer.first_return_date, analyzer.last_date, analyzer.count
+    else:
+        df = results['df']
+        first_date, last_date, bars = df['Date'][0], df['Date'][-1], len(df)
+    row = {'ticker': results['ticker']}
+    row.update({key: float(value) for key, value in results['risk_metrics'].items()})
+    row.update({
+        'start_date': first_date.strftime('%Y-%m-%d'),
+        'end_date': last_date.strftime('%Y-%m-%d'),
+        'trading_days': int(bars),
+        'major_drawdowns': int(len(results['drawdowns']))
+    })
+    if 'tail' in results:
+        row.update({key: float(value) for key, value in results['tail']['metrics'].items()})
+    return row
+
+
+def write_tables(results, directory, fmt='csv'):
+    """Write the analysis frame (unless streamed) and drawdown/recovery tables in fmt, and any tail-risk or portfolio tables as CSV files"""
+    export_results(results, directory, fmt=fmt)
+    safe = results['ticker'].replace('^', '').replace('/', '_')
+    if 'tail' in results:
+        results['tail']['rolling'].to_csv(os.path.join(directory, f"{safe}_rolling_var.csv"))
+        if results['tail']['simulation'] is not None:
+            results['tail']['simulation']['bands'].to_csv(
+                os.path.join(directory, f"{safe}_simulated_drawdowns.csv"), index=False)
+    if 'contributions' in results:
+        results['contributions'].to_csv(os.path.join(directory, f"{safe}_risk_contributions.csv"), index=False)
+        matrix_frame(results['correlation'], results['tickers']).to_csv(
+            os.path.join(directory, f"{safe}_correlation.csv"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rava_cli',
+                                     description='Stock RAVA - Risk And Volatility Analysis (headless)')
+    parser.add_argument('inputs', nargs='+', help='Tickers or CSV/Parquet price files')
+    parser.add_argument('-o', '--output', help='Output file (default: stdout)')
+    parser.add_argument('-f', '--format', choices=['json', 'csv'],
+                        help='Output format (default: from --output extension, else json)')
+    parser.add_argument('--threshold', type=float, default=20, help='Major drawdown threshold in %% (default: 20)')
+    parser.add_argument('--start', help='Only analyze data from this date (YYYY-MM-DD)')
+    parser.add_argument('--interval', default='1d', choices=list(INTERVAL_PERIODS),
+                        help='Bar interval of ticker downloads and of the annualization (default: %(default)s)')
+    parser.add_argument('--windows', default=','.join(str(w) for w in VOLATILITY_WINDOWS),
+                        help='Rolling volatility windows in bars (default: %(default)s)')
+    parser.add_argument('--estimators', default='close',
+                        help=f"Volatility estimators: {', '.join(VOLATILITY_ESTIMATORS)} (default: %(default)s)")
+    parser.add_argument('--ewma', default='', help='EWMA decay factors, e.g. 0.94,0.97')
+    parser.add_argument('--tables', metavar='DIR', help='Also write analysis/drawdown/recovery tables to DIR')
+    parser.add_argument('--export-format', choices=list(EXPORT_FORMATS),
+                        help='File format of --tables and --dataset (default: csv, or parquet for --dataset)')
+    parser.add_argument('--dataset', metavar='DIR',
+                        help='Also write every input into one partitioned dataset in DIR (ticker=<name>/ directories)')
+    parser.add_argument('--chunk-rows', type=int, metavar='N',
+                        help='Stream each history N rows at a time (bounded memory; close-to-close volatility only)')
+    parser.add_argument('--portfolio', action='store_true',
+                        help='Analyze the inputs as one weighted basket (TICKER:weight, unweighted share the rest)')
+    parser.add_argument('--tail', action='store_true',
+                        help='Add historical VaR/CVaR (95%%, 99%%) and simulate forward drawdowns')
+    parser.add_argument('--paths', type=int, default=10_000,
+                        help='Monte Carlo paths for --tail, 0 to skip the simulation (default: %(default)s)')
+    parser.add_argument('--seed', type=int, help='Monte Carlo seed for reproducible --tail results')
+    parser.add_argument('--timing', action='store_true', help='Log per-stage timings to stderr')
+    args = parser.parse_args(argv)
+    try:
+        windows = [int(w) for w in args.windows.split(',') if w.strip()]
+    except ValueError:
+        parser.error(f"--windows must be comma-separated whole numbers of bars, not '{args.windows}'")
+    if not windows or min(windows) < 2:
+        parser.error('--windows needs at least one window, each of 2 bars or more')
+    estimators = [e.strip() for e in args.estimators.split(',') if e.strip()]
+    unknown = [e for e in estimators if e not in VOLATILITY_ESTIMATORS] if estimators else ['(none)']
+    if unknown:
+        parser.error(f"unknown --estimators {', '.join(unknown)}; use {', '.join(VOLATILITY_ESTIMATORS)}")
+    if args.chunk_rows is not None and (args.chunk_rows < 1 or args.estimators != 'close' or args.ewma):
+        parser.error('--chunk-rows needs a positive N and supports only the close estimator, without --ewma')
+    if args.portfolio and args.chunk_rows is not None:
+        parser.error('--portfolio cannot be combined with --chunk-rows')
+    if args.tail and args.chunk_rows is not None:
+        parser.error('--tail needs the per-bar returns, so it cannot be combined with --chunk-rows')
+
+    if args.timing:
+        configure_logging()
+
+    pipeline_options = {
+        'windows': windows,
+        'estimators': estimators,
+        'ewma_lambdas': [float(lam) for lam in args.ewma.split(',') if lam.strip()]
+    }
+
+    fmt = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'json')
+
+    rows, failed = [], 0
+    sources = [','.join(args.inputs)] if args.portfolio else args.inputs
+    for source in sources:
+        try:
+            with trace(ticker=source):
+                if args.portfolio:
+                    results, errors = portfolio_analyze(source, threshold=args.threshold, interval=args.interval,
+                                                        **pipeline_options)
+                    if results is None:
+                        raise ValueError('; '.join(f"{ticker}: {error}" for ticker, error in errors.items()))
+                elif args.chunk_rows:
+                    results = stream_input(source, args.chunk_rows, threshold=args.threshold, start_date=args.start,
+                                           interval=args.interval, windows=pipeline_options['windows'])
+                else:
+                    results = analyze_input(source, threshold=args.threshold, start_date=args.start,
+                                            interval=args.interval, **pipeline_options)
+                if args.tail:
+                    results['tail'] = analyze_tail(results['df']['Daily_Return'], dates=results['df']['Date'],
+                                                   paths=args.paths, seed=args.seed,
+                                                   periods=INTERVAL_PERIODS[args.interval])
+        except Exception as e:
+            print(f"{source}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        rows.append(metrics_row(results))
+        if args.tables:
+            write_tables(results, args.tables, fmt=args.export_format or 'csv')
+        if args.dataset:
+            write_partitions(results, args.dataset, fmt=args.export_format or 'parquet')
+
+    if args.dataset and rows:
+        write_summary(pd.DataFrame(rows), args.dataset, fmt=args.export_format or 'parquet')
+
+    if fmt == 'csv':
+        text = pd.DataFrame(rows).to_csv(index=False)
+    else:
+        text = json.dumps(rows, indent=2) + '\n'
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
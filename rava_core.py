@@ -0,0 +1,698 @@
+"""
+Stock RAVA - Analysis core
+Data loading and the risk/volatility pipeline used by the dashboard, the
+batch mode and the command line, with no Streamlit dependency.
+
+Heavy libraries are imported lazily: yfinance only when downloading and
+matplotlib only for the dashboard. Risk metrics are computed natively with
+NumPy, so ffn and quantstats are not needed. All downloads go through one
+process-wide FetchGate (UPSTREAM), which limits upstream concurrency and
+rate and collapses concurrent identical refreshes of a stored ticker.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from rava_fetch import FetchGate
+from rava_frame import AnalysisFrame
+from rava_store import CHUNK_ROWS, STORE_MAX_AGE, PriceStore, refresh, store_key
+from rava_timing import timed
+
+# Configuration
+RISK_FREE_RATE = 0.025  # 2.5% annual risk-free rate
+VOLATILITY_WINDOWS = (30, 60, 252)  # Default rolling volatility windows (bars; trading days for daily bars)
+VOLATILITY_ESTIMATORS = ('close', 'parkinson', 'garman_klass')  # See rolling_volatility
+SP500_START = '1957-03-04'  # ^GSPC history before the index was created is dropped
+
+# Bar intervals (Yahoo Finance names) and bars per year: 252 sessions of 6.5
+# hours, with a session's last intraday bar counted even when partial
+INTERVAL_PERIODS = {
+    '1m': 252 * 390, '2m': 252 * 195, '5m': 252 * 78, '15m': 252 * 26, '30m': 252 * 13,
+    '60m': 252 * 7, '90m': 252 * 5, '1h': 252 * 7, '1d': 252, '5d': 252 / 5, '1wk': 52
+}
+# Intraday intervals: (days back Yahoo serves them, days per download request)
+INTRADAY_LIMITS = {
+    '1m': (29, 7), '2m': (59, 30), '5m': (59, 30), '15m': (59, 30), '30m': (59, 30),
+    '60m': (729, 180), '90m': (59, 30), '1h': (729, 180)
+}
+
+UPSTREAM = FetchGate()  # Every Yahoo Finance request of this process
+
+def annualization_factor(interval='1d'):
+    """Bars per year for a bar interval, e.g. 252 for '1d' and 19656 for '5m'"""
+    try:
+        return INTERVAL_PERIODS[interval]
+    except KeyError:
+        raise ValueError(f"Unsupported interval '{interval}'; use one of {', '.join(INTERVAL_PERIODS)}") from None
+
+def bar_start(start, interval='1d'):
+    """start floored to the bar boundary at or before it, for interval bars
+
+    Daily bars start at midnight, weekly bars on the Monday of the week and
+    intraday bars on a multiple of the interval since midnight. None stays
+    None (full history).
+    """
+    if start is None:
+        return None
+    start = pd.Timestamp(start)
+    if interval == '1wk':
+        return start.normalize() - pd.Timedelta(days=start.dayofweek)
+    if interval not in INTRADAY_LIMITS:
+        return start.normalize()
+    step = pd.Timedelta(interval.replace('m', 'min'))
+    midnight = start.normalize()
+    return midnight + (start - midnight) // step * step
+
+def fetch_chunks(ticker, start=None, end=None, interval='1d'):
+    """Yield bars from Yahoo Finance as a series of date-range downloads
+    
+    Intraday intervals are requested INTRADAY_LIMITS chunk days at a time,
+    from no earlier than Yahoo serves them; daily and weekly bars come in one
+    request (full history when start is None). Empty ranges are skipped.
+    """
+    import yfinance as yf
+    
+    annualization_factor(interval)  # Validate the interval before touching the network
+    if interval in INTRADAY_LIMITS:
+        lookback_days, chunk_days = INTRADAY_LIMITS[interval]
+        today = pd.Timestamp.now().normalize()
+        earliest = today - pd.Timedelta(days=lookback_days)
+        start = max(pd.Timestamp(start), earliest) if start else earliest
+        end = pd.Timestamp(end) if end else today + pd.Timedelta(days=1)
+        ranges = []
+        while start < end:
+            ranges.append((start, min(start + pd.Timedelta(days=chunk_days), end)))
+            start = ranges[-1][1]
+    else:
+        ranges = [(start, end)]
+    
+    for range_start, range_end in ranges:
+        # auto_adjust=True ensures prices are adjusted for splits and dividends
+        with UPSTREAM.slot(), timed('fetch') as info:
+            if range_start is None:
+                data = yf.download(ticker, period="max", end=range_end, interval=interval, progress=False,
+                                   auto_adjust=True)
+            else:
+                data = yf.download(ticker, start=range_start, end=range_end, interval=interval, progress=False,
+                                   auto_adjust=True)
+            info['rows'] = len(data) if data is not None else 0
+        if data is None or data.empty:
+            continue
+        
+        # Handle multi-level columns
+        if isinstance(data.columns, pd.MultiIndex):
+            data.columns = data.columns.get_level_values(0)
+        yield data
+
+def _download_history(ticker, start, interval):
+    chunks = list(fetch_chunks(ticker, start=start, interval=interval))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks) if chunks else pd.DataFrame()
+
+def fetch_history(ticker, start=None, interval='1d'):
+    """Fetch bars from Yahoo Finance (full history when start is None)
+    
+    start is floored to the interval's bar boundary (bar_start), so requests
+    for the same window ask for the same bars. Daily and weekly bars come in
+    one request, as one DataFrame; direct callers asking for the same bars
+    while a download is running share its result instead of downloading
+    again. Intraday bars take many requests, so they are returned as the
+    fetch_chunks generator and the price store writes each chunk as it
+    arrives. Refreshes of the store are collapsed one level up, in
+    _refresh_prices, since they run under the store's per-key lock.
+    """
+    start = bar_start(start, interval)
+    if interval in INTRADAY_LIMITS:
+        return fetch_chunks(ticker, start=start, interval=interval)
+    key = (ticker.upper(), start, interval)
+    return UPSTREAM.coalesce(key, lambda: _download_history(ticker, start, interval))
+
+def _shared_refresh(store, ticker, fetch, interval, max_age):
+    """refresh(), shared by the callers in this process that refresh the same key at once
+
+    Collapsed here, before the store's per-key lock: behind the lock the
+    waiters would only re-read the entry the first caller wrote (or, with
+    max_age 0, download it again). A fresh entry is returned without it.
+    """
+    key = store_key(ticker, interval)
+    if key in store and store.is_fresh(key, max_age):
+        return refresh(store, ticker, fetch, max_age=max_age, interval=interval)
+    return UPSTREAM.coalesce(('refresh', os.path.abspath(store.root), key),
+                             lambda: refresh(store, ticker, fetch, max_age=max_age, interval=interval))
+
+def _refresh_prices(ticker, store, fetch, interval, max_age=STORE_MAX_AGE):
+    """Resolve ticker and bring its stored history up to date
+    
+    The spelling that worked (plain or '^'-prefixed) is recorded in the
+    store's symbol table, so the '^' fallback is probed at most once per
+    ticker. Returns (resolved ticker, store key, error); error is None on
+    success.
+    """
+    original_ticker = ticker
+    
+    # For index-like tickers (GSPC, DJI, etc.), automatically try with '^' prefix first
+    # Common index tickers that need '^' prefix on Yahoo Finance
+    index_tickers = ['GSPC', 'DJI', 'IXIC', 'RUT', 'VIX']
+    if ticker.upper() in [t.upper() for t in index_tickers] and not ticker.startswith('^'):
+        ticker = '^' + ticker
+    
+    try:
+        # Use the recorded resolution, else whichever spelling is already
+        # stored, so a warm start never has to probe the network for the '^' fallback
+        resolved = store.symbols.resolve(original_ticker)
+        if resolved:
+            ticker = resolved
+        elif (not ticker.startswith('^') and store_key(ticker, interval) not in store
+                and store_key('^' + ticker, interval) in store):
+            ticker = '^' + ticker
+        
+        key = _shared_refresh(store, ticker, fetch, interval, max_age)
+        
+        # If download failed and ticker doesn't start with '^', try adding it
+        if not (key and store.has_bars(key)) and not ticker.startswith('^') and not resolved:
+            ticker_with_caret = '^' + ticker
+            try:
+                caret_key = _shared_refresh(store, ticker_with_caret, fetch, interval, max_age)
+                if caret_key and store.has_bars(caret_key):
+                    ticker, key = ticker_with_caret, caret_key
+            except:
+                pass
+        
+        if not (key and store.has_bars(key)):
+            return original_ticker, None, f"No data available for ticker: {original_ticker}. Try using '^{original_ticker}' for indices."
+        store.symbols.record(original_ticker, ticker)
+        return ticker, key, None
+    except Exception as e:
+        error_msg = str(e)
+        if "Not Found" in error_msg or "delisted" in error_msg.lower():
+            if not original_ticker.startswith('^'):
+                return original_ticker, None, f"Ticker '{original_ticker}' not found. For indices, try '^{original_ticker}'."
+        return original_ticker, None, f"Error downloading data: {error_msg}"
+
+def load_prices(ticker, start_date=None, store=None, fetch=None, interval='1d', max_age=STORE_MAX_AGE):
+    """Load historical data for the given ticker, returning (data, resolved_ticker, error)
+    
+    Full history is kept in the on-disk price store (per bar interval); only
+    bars newer than the stored history are fetched, and none at all while
+    the store is fresh (refreshed less than max_age seconds ago).
+    """
+    store = store or PriceStore()
+    ticker, key, error = _refresh_prices(ticker, store, fetch or fetch_history, interval, max_age)
+    if error:
+        return None, ticker, error
+    
+    try:
+        data = store.load(key)
+        if start_date:
+            data = data[data.index >= start_date]
+        
+        # Filter S&P 500 data to start from actual creation date (March 4, 1957)
+        if ticker.upper() in ['^GSPC', 'GSPC']:
+            if len(data) > 0 and data.index[0] < pd.Timestamp(SP500_START):
+                data = data[data.index >= SP500_START]
+        
+        return data, ticker, None
+    except Exception as e:
+        return None, ticker, f"Error downloading data: {e}"
+
+def iter_prices(ticker, start_date=None, store=None, fetch=None, interval='1d', rows=CHUNK_ROWS):
+    """As load_prices, but returns (chunks, resolved_ticker, error) where chunks
+    is a generator of DataFrames of at most rows bars, read from the store's
+    memory map one at a time (bounded memory for long intraday histories)
+    """
+    store = store or PriceStore()
+    ticker, key, error = _refresh_prices(ticker, store, fetch or fetch_history, interval)
+    if error:
+        return None, ticker, error
+    
+    start = pd.Timestamp(start_date) if start_date else None
+    if ticker.upper() in ['^GSPC', 'GSPC']:
+        start = max(start, pd.Timestamp(SP500_START)) if start is not None else pd.Timestamp(SP500_START)
+    chunks = store.iter_chunks(key, rows)
+    if start is not None:
+        chunks = (chunk[chunk.index >= start] for chunk in chunks)
+    return chunks, ticker, None
+
+def clean_data(raw_data, dtype=np.float64):
+    """Clean and preprocess the data into an AnalysisFrame
+    
+    dtype is the storage type of the derived series added later (drawdowns,
+    volatility); prices and returns stay float64.
+    """
+    return AnalysisFrame.from_prices(raw_data, dtype=dtype)
+
+def calculate_returns(df):
+    """Calculate daily returns, dropping the first bar (which has none)"""
+    close = np.asarray(df['Close'], dtype=np.float64)
+    returns = np.empty(len(close))
+    returns[:1] = np.nan
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1
+    df['Daily_Return'] = returns
+    return df[1:]
+
+def _windowed_sums(terms, windows):
+    """Rolling sums of every column of a 2-D (rows x series) array for every
+    window, taken from one shared cumulative sum.
+    
+    terms has one extra leading row of zeros; it is overwritten with the
+    cumulative sum in place. Yields (window, (rows - window + 1) x series
+    array), aligned to the end of each window, one window at a time; windows
+    longer than the data are skipped.
+    """
+    np.cumsum(terms[1:], axis=0, out=terms[1:])
+    rows = len(terms) - 1
+    for window in windows:
+        if window <= rows:
+            yield window, terms[window:] - terms[:-window]
+
+def _annualize(variance, periods):
+    """Per-bar variance to annualized volatility in %, in place"""
+    variance *= periods
+    np.sqrt(variance, out=variance)
+    variance *= 100
+    return variance
+
+def rolling_volatility(df, windows=VOLATILITY_WINDOWS, estimators=('close',), ewma_lambdas=(),
+                       periods=252, dtype=np.float64):
+    """Annualized rolling volatility (%) for any set of windows and estimators
+    
+    estimators: 'close' (std of Daily_Return, the dashboard default),
+    'parkinson' (High/Low range) and 'garman_klass' (Open/High/Low/Close).
+    ewma_lambdas adds exponentially weighted (RiskMetrics) volatility per decay
+    factor. All windows of all estimators share one cumulative-sum pass.
+    
+    Returns (labels, values): values is a (rows x len(labels)) array of dtype,
+    NaN until a window is full.
+    """
+    returns = np.asarray(df['Daily_Return'], dtype=np.float64)
+    n = len(returns)
+    windows = sorted({int(w) for w in windows if int(w) > 1})
+    estimators = [e for e in VOLATILITY_ESTIMATORS if e in estimators]
+    
+    # Per-bar terms whose windowed sums give each estimator's variance,
+    # written straight into one array (after a leading row of zeros).
+    # Returns are centered on their mean first so the sample variance
+    # (sum(y^2) - sum(y)^2 / w) does not cancel catastrophically.
+    term_counts = {'close': 2, 'parkinson': 1, 'garman_klass': 1}
+    first_col, width = {}, 0
+    for estimator in estimators:
+        first_col[estimator] = width
+        width += term_counts[estimator]
+    terms = np.empty((n + 1, width))
+    terms[0] = 0
+    if 'close' in estimators:
+        centered = terms[1:, first_col['close']]
+        np.subtract(returns, returns.mean() if n else 0.0, out=centered)
+        np.square(centered, out=terms[1:, first_col['close'] + 1])
+    if 'parkinson' in estimators or 'garman_klass' in estimators:
+        log_hl = np.log(np.asarray(df['High'], dtype=np.float64) / np.asarray(df['Low'], dtype=np.float64))
+    if 'parkinson' in estimators:
+        terms[1:, first_col['parkinson']] = log_hl ** 2 / (4 * np.log(2))
+    if 'garman_klass' in estimators:
+        log_co = np.log(np.asarray(df['Close'], dtype=np.float64) / np.asarray(df['Open'], dtype=np.float64))
+        terms[1:, first_col['garman_klass']] = 0.5 * log_hl ** 2 - (2 * np.log(2) - 1) * log_co ** 2
+    
+    prefixes = {'close': 'Volatility', 'parkinson': 'Parkinson', 'garman_klass': 'Garman_Klass'}
+    labels = [f"{prefixes[estimator]}_{window}d" for window in windows for estimator in estimators]
+    labels += [f"EWMA_{lam:g}" for lam in ewma_lambdas]
+    
+    # Each series is annualized in place and written straight into its column
+    values = np.full((n, len(labels)), np.nan, dtype=dtype)
+    for window, sums in _windowed_sums(terms, windows):
+        column = windows.index(window) * len(estimators)
+        for estimator in estimators:
+            col = first_col[estimator]
+            if estimator == 'close':
+                s1, s2 = sums[:, col], sums[:, col + 1]
+                variance = s1 * s1  # (s2 - s1^2 / window) / (window - 1), in place
+                variance /= -window
+                variance += s2
+                variance /= window - 1
+            else:
+                variance = sums[:, col] / window
+            np.maximum(variance, 0, out=variance)
+            values[window - 1:, column] = _annualize(variance, periods)
+            column += 1
+    
+    column = len(windows) * len(estimators)
+    for lam in ewma_lambdas:
+        variance = pd.Series(returns * returns).ewm(alpha=1 - lam, adjust=False).mean().to_numpy(copy=True)
+        values[:, column] = _annualize(variance, periods)
+        column += 1
+    
+    return labels, values
+
+def volatility_name(label):
+    """Human readable name for a rolling_volatility label, e.g. '252-day Volatility'"""
+    prefix, _, suffix = label.rpartition('_')
+    if prefix == 'EWMA':
+        return f"EWMA (λ={suffix}) Volatility"
+    window = suffix[:-1]
+    if prefix == 'Volatility':
+        return f"{window}-day Volatility"
+    return f"{window}-day {prefix.replace('_', '-')} Volatility"
+
+def primary_volatility(labels):
+    """Index of the series the dashboard headlines: the longest close-to-close
+    window, else the longest window of any estimator, else the first series"""
+    windowed = [i for i, label in enumerate(labels) if label.endswith('d')]
+    close = [i for i in windowed if labels[i].startswith('Volatility_')]
+    candidates = close or windowed
+    if candidates:
+        return max(candidates, key=lambda i: int(labels[i].rpartition('_')[2][:-1]))
+    return 0
+
+def volatility_frame(volatility):
+    """Expand a (labels, values) volatility result into a DataFrame, e.g. for export"""
+    labels, values = volatility
+    return pd.DataFrame(values, columns=labels)
+
+def calculate_volatility(df, windows=VOLATILITY_WINDOWS, periods=252):
+    """Calculate rolling volatility columns (Volatility_<window>d) on the frame,
+    annualized with periods bars per year"""
+    labels, values = rolling_volatility(df, windows, periods=periods)
+    for i, label in enumerate(labels):
+        df[label] = values[:, i]
+    return df
+
+def calculate_drawdown(df):
+    """Calculate drawdown metrics from the running maximum"""
+    close = np.asarray(df['Close'], dtype=np.float64)
+    running_max = np.maximum.accumulate(close)
+    drawdown = np.divide(close, running_max)
+    drawdown -= 1
+    drawdown *= 100
+    df['Drawdown'] = drawdown
+    df['Running_Max'] = running_max
+    df['Max_Drawdown'] = np.minimum.accumulate(drawdown)
+    return df
+
+def detect_drawdown_episodes(close, running_max=None, entry_level=0.95):
+    """Locate peak/trough/end/recovery indices of every drawdown episode in one pass.
+
+    An episode starts at a new closing high, is entered once the close falls
+    below ``entry_level`` times that high, and ends at the next strictly higher
+    close. Recovery is the first close after the trough back at the peak level.
+    Returns a dict of int64 index arrays; ``end_idx`` and ``recovery_idx`` are
+    -1 for an episode that is still open.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    if n == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return {'peak_idx': empty, 'trough_idx': empty, 'end_idx': empty, 'recovery_idx': empty}
+    
+    if running_max is None:
+        running_max = np.maximum.accumulate(close)
+    else:
+        running_max = np.asarray(running_max, dtype=np.float64)
+    
+    # A row starts a new segment when it closes strictly above the prior high
+    new_high = np.empty(n, dtype=bool)
+    new_high[0] = True
+    new_high[1:] = close[1:] > running_max[:-1]
+    seg_starts = np.flatnonzero(new_high)
+    seg_id = np.cumsum(new_high) - 1
+    
+    # First (earliest) minimum within each segment
+    seg_min = np.minimum.reduceat(close, seg_starts)
+    at_min = np.flatnonzero(close == seg_min[seg_id])
+    _, first = np.unique(seg_id[at_min], return_index=True)
+    seg_trough = at_min[first]
+    
+    seg_ends = np.append(seg_starts[1:], -1)
+    entered = seg_min < close[seg_starts] * entry_level
+    peak_idx = seg_starts[entered]
+    trough_idx = seg_trough[entered]
+    
+    # Within a segment the running max equals the peak, so the first close at
+    # the running max after the trough is the recovery (ties included)
+    at_high = np.flatnonzero(close >= running_max)
+    pos = np.searchsorted(at_high, trough_idx, side='right')
+    recovered = pos < len(at_high)
+    recovery_idx = np.full(len(trough_idx), -1, dtype=np.int64)
+    recovery_idx[recovered] = at_high[pos[recovered]]
+    
+    return {
+        'peak_idx': peak_idx.astype(np.int64),
+        'trough_idx': trough_idx.astype(np.int64),
+        'end_idx': seg_ends[entered].astype(np.int64),
+        'recovery_idx': recovery_idx
+    }
+
+def _major_episodes(close, running_max=None, threshold=20):
+    """Episodes from detect_drawdown_episodes whose depth is >= threshold %"""
+    close = np.asarray(close, dtype=np.float64)
+    episodes = detect_drawdown_episodes(close, running_max)
+    peak_price = close[episodes['peak_idx']]
+    trough_price = close[episodes['trough_idx']]
+    drawdown_pct = (trough_price - peak_price) / peak_price * 100
+    keep = np.abs(drawdown_pct) >= threshold
+    episodes = {key: idx[keep] for key, idx in episodes.items()}
+    episodes['drawdown_pct'] = drawdown_pct[keep]
+    return episodes
+
+def _drawdown_table(dates, close, episodes):
+    peak_idx, trough_idx = episodes['peak_idx'], episodes['trough_idx']
+    peak_dates = dates[peak_idx]
+    trough_dates = dates[trough_idx]
+    
+    return pd.DataFrame({
+        'Peak_Date': peak_dates,
+        'Trough_Date': trough_dates,
+        'Peak_Price': close[peak_idx],
+        'Trough_Price': close[trough_idx],
+        'Drawdown_Pct': episodes['drawdown_pct'],
+        'Duration_Days': (trough_dates - peak_dates).days.astype(np.int64),
+        'Status': np.where(episodes['recovery_idx'] >= 0, 'Recovered', 'Open')
+    })
+
+def _recovery_table(dates, episodes):
+    peak_idx, trough_idx, recovery_idx = episodes['peak_idx'], episodes['trough_idx'], episodes['recovery_idx']
+    recovered = recovery_idx >= 0
+    
+    trough_dates = dates[trough_idx]
+    # Index the DatetimeIndex itself (not .values), so a timezone is kept
+    recovery_dates = dates[np.where(recovered, recovery_idx, 0)].where(recovered)
+    recovery_days = np.where(recovered, (recovery_dates - trough_dates).days, np.nan)
+    
+    return pd.DataFrame({
+        'Drawdown_Pct': episodes['drawdown_pct'],
+        'Drawdown_Duration_Days': (trough_dates - dates[peak_idx]).days.astype(np.int64),
+        'Recovery_Days': recovery_days,
+        'Recovery_Months': np.round(recovery_days / 30.44, 1),  # Average days per month
+        'Trough_Date': trough_dates,
+        'Recovery_Date': recovery_dates,
+        'Status': np.where(recovered, 'Recovered', 'Open')
+    })
+
+def drawdown_tables(dates, close, running_max=None, threshold=20):
+    """Major drawdown and recovery tables from one episode scan
+
+    Returns (find_major_drawdowns table, calculate_recovery table); the
+    episodes are detected once and both tables are built from them.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    episodes = _major_episodes(close, running_max, threshold)
+    dates = pd.DatetimeIndex(dates)
+    return _drawdown_table(dates, close, episodes), _recovery_table(dates, episodes)
+
+def _float64_running_max(df):
+    # A narrowed (float32) running max cannot be compared exactly with the closes
+    running_max = df['Running_Max'] if 'Running_Max' in df.columns else None
+    if running_max is not None and running_max.dtype != np.float64:
+        running_max = None
+    return running_max
+
+def find_major_drawdowns(df, threshold=20):
+    """Find all major drawdown periods (>= threshold %), including one still open"""
+    close = np.asarray(df['Close'], dtype=np.float64)
+    episodes = _major_episodes(close, _float64_running_max(df), threshold)
+    return _drawdown_table(pd.DatetimeIndex(df['Date']), close, episodes)
+
+def calculate_recovery(dates, close, running_max=None, threshold=20):
+    """Calculate recovery time for each major drawdown (>= threshold %)
+
+    Takes the Date and Close columns as arrays. Drawdowns that have not yet
+    recovered are reported with Status 'Open' and no recovery date.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    episodes = _major_episodes(close, running_max, threshold)
+    return _recovery_table(pd.DatetimeIndex(dates), episodes)
+
+def calculate_return_metrics(returns, rf=RISK_FREE_RATE, periods=252):
+    """Compute total return, CAGR, volatility, Sharpe, Sortino and max drawdown
+    from a periodic returns array in a few vectorized passes.
+
+    Definitions follow quantstats: CAGR annualizes by observation count,
+    Sharpe/Sortino use the de-annualized rf, Sortino's downside deviation is
+    taken over all observations, and max drawdown is measured on the
+    compounded wealth curve starting from 1.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    finite = np.isfinite(r)
+    if not finite.all():
+        r = r[finite]
+    n = len(r)
+    if n == 0:
+        return {key: np.nan for key in ['total_return', 'cagr', 'volatility', 'sharpe', 'sortino', 'max_drawdown']}
+    
+    wealth = r + 1
+    np.multiply.accumulate(wealth, out=wealth)
+    total_return = wealth[-1] - 1
+    cagr = wealth[-1] ** (periods / n) - 1 if wealth[-1] >= 0 else np.nan
+    
+    # Drawdown from a starting equity of 1 (the peaks buffer is reused for the ratio)
+    peaks = np.maximum(wealth, 1.0)
+    np.maximum.accumulate(peaks, out=peaks)
+    max_drawdown = min(np.divide(wealth, peaks, out=peaks).min(), 1.0) - 1
+    
+    std = r.std(ddof=1) if n > 1 else np.nan
+    excess = r - ((1 + rf) ** (1.0 / periods) - 1)
+    excess_mean = excess.mean()
+    excess_std = excess.std(ddof=1) if n > 1 else np.nan
+    downside = np.minimum(excess, 0, out=excess)
+    downside = np.sqrt(np.square(downside, out=downside).sum() / n)
+    
+    return {
+        'total_return': total_return,
+        'cagr': cagr,
+        'volatility': std * np.sqrt(periods),
+        'sharpe': excess_mean / excess_std * np.sqrt(periods) if excess_std > 0 else np.nan,
+        'sortino': excess_mean / downside * np.sqrt(periods) if downside > 0 else np.nan,
+        'max_drawdown': max_drawdown
+    }
+
+def calculate_risk_metrics(df, ticker, periods=252):
+    """Calculate comprehensive risk metrics, annualized with periods bars per year"""
+    metrics = calculate_return_metrics(np.asarray(df['Daily_Return'], dtype=np.float64),
+                                       rf=RISK_FREE_RATE, periods=periods)
+    
+    dates = pd.DatetimeIndex(df['Date'])
+    years = (dates[-1] - dates[0]).days / 365.25
+    excess_return = metrics['cagr'] - RISK_FREE_RATE
+    
+    return {
+        'total_return': metrics['total_return'],
+        'cagr': metrics['cagr'],
+        'volatility': metrics['volatility'],
+        'sharpe': metrics['sharpe'],
+        'sortino': metrics['sortino'],
+        'max_drawdown': metrics['max_drawdown'],
+        'years': years,
+        'excess_return': excess_return,
+        'risk_free_rate': RISK_FREE_RATE
+    }
+
+def create_dashboard(df, risk_metrics, ticker, recovery_df, volatility=None):
+    """Create comprehensive visualization dashboard
+    
+    volatility is the (labels, values) result of rolling_volatility; the
+    default windows are computed if it is not given.
+    """
+    import matplotlib.pyplot as plt
+    
+    vol_labels, vol_values = volatility if volatility is not None else rolling_volatility(df)
+    primary = primary_volatility(vol_labels)
+    primary_name = volatility_name(vol_labels[primary]) if vol_labels else 'Volatility'
+    primary_values = vol_values[:, primary] if vol_labels else np.full(len(df), np.nan)
+    
+    fig = plt.figure(figsize=(18, 12))
+    gs = fig.add_gridspec(3, 2, hspace=0.3, wspace=0.3)
+    
+    # 1. Price with volatility overlay
+    ax1 = fig.add_subplot(gs[0, :])
+    ax1_twin = ax1.twinx()
+    ax1.plot(df['Date'], df['Close'], label=f'{ticker} Price', color='steelblue', linewidth=1.5)
+    ax1_twin.plot(df['Date'], primary_values, label=primary_name, 
+                 color='orange', alpha=0.7, linewidth=1.5)
+    ax1.set_ylabel('Price', fontsize=11, color='steelblue')
+    ax1_twin.set_ylabel('Volatility (%)', fontsize=11, color='orange')
+    ax1.set_title('Price and Volatility Over Time', fontsize=12, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper left')
+    ax1_twin.legend(loc='upper right')
+    
+    # 2. Drawdown
+    ax2 = fig.add_subplot(gs[1, 0])
+    ax2.fill_between(df['Date'], df['Drawdown'], 0, color='red', alpha=0.3)
+    ax2.set_ylabel('Drawdown (%)', fontsize=11)
+    ax2.set_title('Drawdown from Peak', fontsize=12, fontweight='bold')
+    ax2.grid(True, alpha=0.3)
+    
+    # 3. Volatility distribution
+    ax3 = fig.add_subplot(gs[1, 1])
+    ax3.hist(primary_values[np.isfinite(primary_values)], bins=50, color='steelblue', alpha=0.7, edgecolor='black')
+    ax3.set_xlabel(f'{primary_name} (%)', fontsize=11)
+    ax3.set_ylabel('Frequency', fontsize=11)
+    ax3.set_title(f'Distribution of {primary_name}', fontsize=12, fontweight='bold')
+    ax3.grid(True, axis='y', alpha=0.3)
+    
+    # 4. Returns distribution
+    ax4 = fig.add_subplot(gs[2, 0])
+    ax4.hist(df['Daily_Return'] * 100, bins=100, color='green', alpha=0.7, edgecolor='black')
+    ax4.set_xlabel('Daily Return (%)', fontsize=11)
+    ax4.set_ylabel('Frequency', fontsize=11)
+    ax4.set_title('Distribution of Daily Returns', fontsize=12, fontweight='bold')
+    ax4.grid(True, axis='y', alpha=0.3)
+    
+    # 5. Rolling volatility comparison OR Drawdown vs Recovery
+    ax5 = fig.add_subplot(gs[2, 1])
+    if len(recovery_df) > 0:
+        ax5.scatter(recovery_df['Drawdown_Pct'], recovery_df['Recovery_Months'],
+                   s=100, alpha=0.6, color='red', edgecolors='black')
+        ax5.set_xlabel('Drawdown Magnitude (%)', fontsize=11)
+        ax5.set_ylabel('Recovery Time (Months)', fontsize=11)
+        ax5.set_title('Drawdown vs Recovery Time', fontsize=12, fontweight='bold')
+        ax5.grid(True, alpha=0.3)
+    else:
+        for i, label in enumerate(vol_labels):
+            ax5.plot(df['Date'], vol_values[:, i], label=volatility_name(label).replace(' Volatility', ''),
+                     alpha=0.7, linewidth=1)
+        ax5.set_ylabel('Volatility (%)', fontsize=11)
+        ax5.set_title('Rolling Volatility Comparison', fontsize=12, fontweight='bold')
+        ax5.legend()
+        ax5.grid(True, alpha=0.3)
+    
+    plt.suptitle(f'{ticker} Comprehensive Risk Analysis Dashboard', 
+                 fontsize=16, fontweight='bold', y=0.995)
+    
+    return fig
+
+def run_pipeline(raw_data, ticker, threshold=20, windows=VOLATILITY_WINDOWS, estimators=('close',),
+                 ewma_lambdas=(), dtype=np.float64, interval='1d'):
+    """Run the full analysis pipeline on raw price data
+    
+    Returns a dict with the AnalysisFrame ('df'), the rolling 'volatility'
+    (labels, values) from rolling_volatility, the 'drawdowns' and 'recovery'
+    tables and the 'risk_metrics' dict, exactly as the dashboard shows them.
+    With dtype=np.float32 the volatility and drawdown series take half the
+    memory; the tables and risk metrics are still computed in float64.
+    interval is the bar interval of raw_data: volatility and risk metrics are
+    annualized with its annualization_factor.
+    """
+    periods = annualization_factor(interval)
+    with timed('clean', rows=len(raw_data)):
+        df = clean_data(raw_data, dtype=dtype)
+    with timed('returns', rows=len(df)):
+        df = calculate_returns(df)
+    with timed('volatility', rows=len(df)):
+        volatility = rolling_volatility(df, windows, estimators, ewma_lambdas, periods=periods, dtype=dtype)
+    with timed('drawdown', rows=len(df)):
+        df = calculate_drawdown(df)
+    with timed('drawdown_tables', rows=len(df)):
+        drawdowns_df, recovery_df = drawdown_tables(df['Date'], df['Close'], _float64_running_max(df),
+                                                    threshold=threshold)
+    with timed('risk_metrics', rows=len(df)):
+        risk_metrics = calculate_risk_metrics(df, ticker, periods=periods)
+    return {
+        'ticker': ticker,
+        'df': df,
+        'volatility': volatility,
+        'drawdowns': drawdowns_df,
+        'recovery': recovery_df,
+        'risk_metrics': risk_metrics
+    }
@@ -0,0 +1,223 @@
+"""
+Stock RAVA - Data export
+Writes analysis results as compressed CSV, Parquet or Arrow (Feather v2)
+files: the per-bar data with every derived column (returns, drawdowns,
+rolling volatility and, if computed, rolling VaR/CVaR) plus the drawdown and
+recovery tables. The per-bar data is converted and written EXPORT_CHUNK_ROWS
+rows at a time, so long (e.g. intraday) histories never exist as one big
+DataFrame or string.
+
+Many tickers can be written into one partitioned dataset, one directory per
+table and ticker (Hive style, ticker=<name>), which pandas, pyarrow, DuckDB
+or Spark read as a single table:
+    <root>/analysis/ticker=AAPL/part-0.parquet
+    <root>/drawdowns/ticker=AAPL/part-0.parquet
+    <root>/recovery/ticker=AAPL/part-0.parquet
+    <root>/summary.parquet
+
+Parquet and Arrow need pyarrow; CSV needs nothing extra.
+
+Usage:
+    from rava_export import export_results, export_zip
+    export_results(results, 'out/', fmt='parquet')
+    data = export_zip(results, fmt='csv.gz')   # one archive, e.g. for a download button
+"""
+import gzip
+import io
+import os
+import zipfile
+from urllib.parse import quote
+
+import pandas as pd
+
+from rava_timing import timed
+
+EXPORT_FORMATS = {'csv.gz': 'csv.gz', 'csv': 'csv', 'parquet': 'parquet', 'arrow': 'arrow'}  # format: file extension
+EXPORT_CHUNK_ROWS = 250_000  # Rows converted and written at a time
+TABLES = ('drawdowns', 'recovery')  # Result tables exported next to the per-bar data
+
+
+def available_formats():
+    """Export formats usable here: the pyarrow ones only if pyarrow is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ['csv.gz', 'csv']
+    return list(EXPORT_FORMATS)
+
+
+def _derived_blocks(results):
+    """(labels, (rows x labels) values) blocks aligned with results['df'] rows"""
+    blocks = [results['volatility']]
+    tail = results.get('tail')
+    if tail is not None:
+        rolling = tail['rolling']
+        if isinstance(rolling, pd.DataFrame):
+            rolling = (list(rolling.columns), rolling.to_numpy())
+        if len(rolling[1]) == len(results['df']):
+            blocks.append(rolling)
+    return blocks
+
+
+def iter_analysis_chunks(results, rows=EXPORT_CHUNK_ROWS):
+    """Yield the per-bar analysis data as DataFrames of at most rows rows
+
+    Columns: every column of the analysis frame, then the rolling volatility
+    (and rolling VaR/CVaR if results has 'tail') series.
+    """
+    df = results['df']
+    blocks = _derived_blocks(results)
+    for start in range(0, max(len(df), 1), rows):
+        chunk = df[start:start + rows].to_pandas()
+        for labels, values in blocks:
+            for i, label in enumerate(labels):
+                chunk[label] = values[start:start + rows, i]
+        yield chunk
+
+
+def write_frames(chunks, target, fmt):
+    """Write an iterable of same-schema DataFrames to target (a path or a binary file object)
+
+    Nothing is written for an empty iterable. Returns the rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'; use one of {', '.join(EXPORT_FORMATS)}")
+    rows = 0
+    if fmt in ('csv', 'csv.gz'):
+        own = isinstance(target, (str, os.PathLike))
+        raw = open(target, 'wb') if own else target
+        f = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if fmt == 'csv.gz' else raw
+        try:
+            for chunk in chunks:
+                f.write(chunk.to_csv(index=False, header=rows == 0).encode())
+                rows += len(chunk)
+        finally:
+            if fmt == 'csv.gz':
+                f.close()
+            if own:
+                raw.close()
+        return rows
+
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                if fmt == 'parquet':
+                    writer = pq.ParquetWriter(target, table.schema, compression='zstd')
+                else:
+                    writer = pa.ipc.new_file(target, table.schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+            writer.write_table(table.cast(writer.schema) if fmt == 'parquet' else table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _file_name(ticker, table, fmt):
+    safe = ticker.replace('^', '').replace('/', '_')
+    return f"{safe}_{table}.{EXPORT_FORMATS[fmt]}"
+
+
+def export_results(results, directory, fmt='csv.gz', rows=EXPORT_CHUNK_ROWS):
+    """Write the analysis data and the drawdown/recovery tables to directory
+
+    Files are named <TICKER>_analysis_data.<ext>, <TICKER>_drawdowns.<ext>
+    and <TICKER>_recovery.<ext>. Returns the paths written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    with timed('export', rows=len(results['df']) if 'df' in results else None):
+        if 'df' in results:
+            path = os.path.join(directory, _file_name(results['ticker'], 'analysis_data', fmt))
+            write_frames(iter_analysis_chunks(results, rows), path, fmt)
+            paths.append(path)
+        for table in TABLES:
+            path = os.path.join(directory, _file_name(results['ticker'], table, fmt))
+            write_frames([results[table]], path, fmt)
+            paths.append(path)
+    return paths
+
+
+def export_zip(results, fmt='csv.gz', rows=EXPORT_CHUNK_ROWS):
+    """The files of export_results as one zip archive (bytes)
+
+    Entries are streamed into the archive chunk by chunk; they are stored
+    uncompressed, since every format is already compressed (except plain csv,
+    which is deflated).
+    """
+    buffer = io.BytesIO()
+    compression = zipfile.ZIP_DEFLATED if fmt == 'csv' else zipfile.ZIP_STORED
+    with timed('export', rows=len(results['df'])), zipfile.ZipFile(buffer, 'w', compression) as archive:
+        with archive.open(_file_name(results['ticker'], 'analysis_data', fmt), 'w', force_zip64=True) as f:
+            write_frames(iter_analysis_chunks(results, rows), f if fmt in ('csv', 'csv.gz') else _Sink(f), fmt)
+        for table in TABLES:
+            with archive.open(_file_name(results['ticker'], table, fmt), 'w') as f:
+                write_frames([results[table]], f if fmt in ('csv', 'csv.gz') else _Sink(f), fmt)
+    return buffer.getvalue()
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable wrapper so pyarrow streams into a zip entry"""
+
+    def __init__(self, f):
+        self._f = f
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._f.write(data)
+
+
+def partition_dir(root, table, ticker):
+    """Directory of one ticker's partition of a table: <root>/<table>/ticker=<quoted ticker>"""
+    return os.path.join(root, table, f"ticker={quote(ticker, safe='')}")
+
+
+def write_partitions(results, root, fmt='parquet', rows=EXPORT_CHUNK_ROWS):
+    """Write one ticker's analysis data and tables into a partitioned dataset under root
+
+    An existing partition of the ticker is replaced. The ticker is only in
+    the directory name (readers add it as a column). Returns the rows of
+    per-bar data written.
+    """
+    ext = EXPORT_FORMATS[fmt]
+    written = 0
+    for table in ('analysis',) + TABLES:
+        if table == 'analysis' and 'df' not in results:
+            continue
+        directory = partition_dir(root, table, results['ticker'])
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith('part-'):
+                os.remove(os.path.join(directory, name))
+        path = os.path.join(directory, f"part-0.{ext}")
+        tmp_path = os.path.join(directory, f".part-0.{ext}.tmp")
+        if table == 'analysis':
+            written = write_frames(iter_analysis_chunks(results, rows), tmp_path, fmt)
+        else:
+            write_frames([results[table]], tmp_path, fmt)
+        os.replace(tmp_path, path)
+    return written
+
+
+def write_summary(table, root, fmt='parquet'):
+    """Write the per-ticker summary (e.g. the batch comparison table) next to the partitions"""
+    os.makedirs(root, exist_ok=True)
+    path = os.path.join(root, f"summary.{EXPORT_FORMATS[fmt]}")
+    write_frames([table], path, fmt)
+    return path
+
+
+def read_dataset(root, table='analysis'):
+    """Read one table of a Parquet dataset written by write_partitions, with a ticker column"""
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(os.path.join(root, table), format='parquet', partitioning='hive')
+    return dataset.to_table().to_pandas()
@@ -0,0 +1,102 @@
+"""
+Stock RAVA - Upstream fetch gate
+Every Yahoo Finance request in the process goes through one FetchGate:
+- identical requests that overlap in time are collapsed: the first caller
+  downloads and every other caller waits for and shares its result, so ten
+  sessions opening the same uncached ticker cause one download, not ten;
+- at most FETCH_CONCURRENCY downloads run at once;
+- downloads start at no more than FETCH_RATE per second (token bucket,
+  bursts of up to FETCH_BURST).
+
+Usage:
+    gate = FetchGate(max_concurrent=2, rate=1.0)
+    data = gate.coalesce(('AAPL', None, '1d'), lambda: download('AAPL'))
+    with gate.slot():
+        ...  # one upstream request
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from rava_timing import record_cache
+
+FETCH_CONCURRENCY = int(os.environ.get('STOCK_RAVA_FETCH_CONCURRENCY', 4))  # Downloads in flight per process
+FETCH_RATE = float(os.environ.get('STOCK_RAVA_FETCH_RATE', 2.0))  # Download starts per second (0 disables)
+FETCH_BURST = 5  # Downloads that may start back to back after an idle spell
+
+
+class FetchGate:
+    """Coalesces identical in-flight requests and bounds upstream concurrency and rate"""
+
+    def __init__(self, max_concurrent=FETCH_CONCURRENCY, rate=FETCH_RATE, burst=FETCH_BURST,
+                 clock=time.monotonic, sleep=time.sleep):
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrent))
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self.requests = 0  # Upstream requests made
+        self.coalesced = 0  # Callers served by another caller's request
+
+    def _wait_for_token(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    @contextmanager
+    def slot(self):
+        """Hold one upstream request slot, taken once the rate limit allows"""
+        with self._slots:
+            self._wait_for_token()
+            with self._lock:
+                self.requests += 1
+            yield
+
+    def coalesce(self, key, func):
+        """Return func(), or the result of the identical call (same key) already in flight
+
+        Exceptions are shared the same way. Only overlapping calls are
+        collapsed; a call made after the first one finished runs again.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        record_cache('fetch_coalesce', not leader)
+        if not leader:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        """Counters: upstream requests, coalesced callers and requests in flight"""
+        with self._lock:
+            return {'requests': self.requests, 'coalesced': self.coalesced, 'in_flight': len(self._inflight)}
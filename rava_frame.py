@@ -0,0 +1,126 @@
+"""
+Stock RAVA - Columnar analysis frame
+Compact per-ticker container for the analysis pipeline: one NumPy array per
+column, dates as int64 nanoseconds since the epoch, and derived series stored
+in a selectable float dtype (float32 halves them). Building it from a price
+DataFrame copies a column only when it has to be filtered, reordered or
+filled, and row slices are views, so the pipeline no longer makes a full copy
+of the frame at every cleaning step.
+
+It supports the part of the DataFrame interface the pipeline and the
+dashboard use: frame[column], frame[column] = values, frame[start:stop],
+len(frame), frame.columns and frame.copy(). Use to_pandas() for display or
+export.
+"""
+import numpy as np
+import pandas as pd
+
+from rava_store import PRICE_COLUMNS
+
+FLOAT64_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Daily_Return')  # Inputs to later calculations; never narrowed
+
+
+def _filled(values, fill):
+    """values with NaNs replaced by fill (a scalar or an array); copies only if there are NaNs"""
+    missing = np.isnan(values)
+    return np.where(missing, fill, values) if missing.any() else values
+
+
+class AnalysisFrame:
+    """Per-ticker analysis data as a set of equal-length NumPy columns"""
+
+    def __init__(self, dates, columns=None, dtype=np.float64, tz=None):
+        self.dates = np.asarray(dates).view(np.int64)
+        self.dtype = np.dtype(dtype)
+        self.tz = tz
+        self._columns = {}
+        for name, values in (columns or {}).items():
+            self[name] = values
+
+    @classmethod
+    def from_prices(cls, raw_data, dtype=np.float64):
+        """Clean a price DataFrame (Date column or index, OHLCV columns) into a frame
+
+        Rows without a close or date are dropped, missing Open/High/Low are
+        filled with the close and missing volume with 0, and duplicate dates
+        keep their first row; rows are returned in date order.
+        """
+        dates = pd.DatetimeIndex(pd.to_datetime(raw_data['Date'] if 'Date' in raw_data.columns else raw_data.index))
+        if dates.unit != 'ns':
+            dates = dates.as_unit('ns')
+        tz = dates.tz
+        epoch_ns = dates.asi8
+
+        # When auto_adjust=True, 'Close' is already adjusted
+        # But if 'Adj Close' exists, prefer it for maximum accuracy
+        close_col = 'Adj Close' if 'Adj Close' in raw_data.columns else 'Close'
+        n = len(raw_data)
+        prices = {}
+        for col in PRICE_COLUMNS:
+            source = close_col if col == 'Close' else col
+            if source in raw_data.columns:
+                prices[col] = raw_data[source].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                prices[col] = np.full(n, np.nan)
+
+        # Drop rows without a close or date; keep the first row of each date, in date order
+        valid = ~np.isnan(prices['Close']) & (epoch_ns != np.iinfo(np.int64).min)
+        rows = None if valid.all() else np.flatnonzero(valid)
+        selected = epoch_ns if rows is None else epoch_ns[rows]
+        if len(selected) > 1 and not (selected[1:] > selected[:-1]).all():
+            _, first = np.unique(selected, return_index=True)
+            rows = first if rows is None else rows[first]
+        if rows is not None:
+            epoch_ns = epoch_ns[rows]
+            prices = {col: values[rows] for col, values in prices.items()}
+
+        close = prices['Close']
+        prices['Volume'] = _filled(prices['Volume'], 0.0)
+        for col in ['Open', 'High', 'Low']:
+            prices[col] = _filled(prices[col], close)
+        return cls(epoch_ns, prices, dtype=dtype, tz=tz)
+
+    @property
+    def columns(self):
+        return ['Date'] + list(self._columns)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __contains__(self, name):
+        return name == 'Date' or name in self._columns
+
+    def __getitem__(self, key):
+        """Column by name (ndarray; 'Date' is a DatetimeIndex over the same memory), or a row slice"""
+        if isinstance(key, slice):
+            frame = AnalysisFrame(self.dates[key], dtype=self.dtype, tz=self.tz)
+            frame._columns = {name: values[key] for name, values in self._columns.items()}
+            return frame
+        if key == 'Date':
+            dates = pd.DatetimeIndex(self.dates.view('datetime64[ns]'), copy=False)
+            return dates.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else dates
+        return self._columns[key]
+
+    def __setitem__(self, name, values):
+        values = np.asarray(values)
+        if len(values) != len(self.dates):
+            raise ValueError(f"Column '{name}' has {len(values)} rows, expected {len(self.dates)}")
+        if values.dtype.kind == 'f' and name not in FLOAT64_COLUMNS:
+            values = values.astype(self.dtype, copy=False)
+        self._columns[name] = values
+
+    def copy(self):
+        """Frame with its own copy of the dates and every column, like DataFrame.copy()"""
+        frame = AnalysisFrame(self.dates.copy(), dtype=self.dtype, tz=self.tz)
+        frame._columns = {name: values.copy() for name, values in self._columns.items()}
+        return frame
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns"""
+        return self.dates.nbytes + sum(values.nbytes for values in self._columns.values())
+
+    def to_pandas(self, columns=None):
+        """Copy (some of) the columns into a DataFrame, e.g. for display or CSV export"""
+        columns = columns or self.columns
+        return pd.DataFrame({name: self[name] for name in columns})
@@ -0,0 +1,267 @@
+"""
+Stock RAVA - Portfolio analysis
+Risk of a weighted basket of tickers. The cleaned closes of all holdings are
+aligned on their common dates into one (time x assets) array, and everything
+else is computed on that array with batched NumPy operations: the portfolio
+return series, rolling covariance and correlation matrices (einsum over
+blocks of windows, never per pair of holdings) and each holding's
+contribution to portfolio risk. The portfolio's value curve then goes
+through the single-ticker pipeline, so its drawdown and recovery tables and
+risk metrics are the same ones the dashboard shows for a ticker.
+
+Usage:
+    from rava_portfolio import portfolio_analyze
+    results, errors = portfolio_analyze({'AAPL': 0.4, 'MSFT': 0.4, '^GSPC': 0.2})
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from rava_batch import DOWNLOAD_WORKERS, fetch_many
+from rava_core import annualization_factor, clean_data, run_pipeline
+from rava_timing import timed
+
+COVARIANCE_WINDOW = 252  # Bars per rolling covariance/correlation window
+COVARIANCE_STEP = 21  # Bars between successive rolling windows (about monthly for daily bars)
+BLOCK_BYTES = 64 * 1024 * 1024  # Approximate working memory per batch of rolling windows
+PORTFOLIO_NAV = 100.0  # Starting value of the portfolio value curve
+
+
+def parse_weights(text):
+    """Parse 'AAPL:0.4, MSFT 0.6' (or a dict / (ticker, weight) pairs) into {TICKER: weight}
+
+    Tickers without a weight share equally what the weighted ones leave of 1
+    (or all of it if none is weighted). Repeated tickers have their weights
+    added. Raises ValueError for an empty basket, a bad weight, or unweighted
+    tickers when the given weights already sum to 1 or more.
+    """
+    if isinstance(text, dict):
+        pairs = list(text.items())
+    elif isinstance(text, str):
+        pairs = []
+        for item in re.split(r'[,;\n]+', text):
+            parts = re.split(r'[\s:=]+', item.strip())
+            if parts and parts[0]:
+                pairs.append((parts[0], parts[1] if len(parts) > 1 and parts[1] else None))
+    else:
+        pairs = list(text)
+
+    weights, unweighted = {}, []
+    for ticker, weight in pairs:
+        ticker = str(ticker).strip().upper()
+        if weight is None:
+            if ticker not in weights and ticker not in unweighted:
+                unweighted.append(ticker)
+            continue
+        try:
+            weight = float(str(weight).rstrip('%')) / (100 if str(weight).endswith('%') else 1)
+        except ValueError:
+            raise ValueError(f"Invalid weight '{weight}' for {ticker}") from None
+        weights[ticker] = weights.get(ticker, 0.0) + weight
+    unweighted = [ticker for ticker in unweighted if ticker not in weights]
+    if unweighted:
+        remainder = 1.0 - sum(weights.values()) if weights else 1.0
+        if remainder <= 1e-9:  # Allow for rounding: 0.7 + 0.2 + 0.1 leaves 1e-16
+            raise ValueError(f"Weights already sum to {1.0 - remainder:g}, leaving nothing for "
+                             f"{', '.join(unweighted)}; give every ticker a weight or lower the others")
+        weights.update({ticker: remainder / len(unweighted) for ticker in unweighted})
+    if not weights:
+        raise ValueError("Enter at least one ticker")
+    return weights
+
+
+def normalize_weights(weights):
+    """Weights scaled to sum to 1 (an array, in the order given)"""
+    weights = np.asarray(weights, dtype=np.float64)
+    total = weights.sum()
+    if not np.isfinite(total) or total == 0:
+        raise ValueError("Portfolio weights must have a non-zero sum")
+    return weights / total
+
+
+def align_closes(frames):
+    """Align cleaned closes on the dates every holding has
+
+    frames maps ticker to an AnalysisFrame (from clean_data). Returns
+    (DatetimeIndex, (dates x tickers) float64 close array), columns in the
+    order of frames.
+    """
+    frames = list(frames.values())
+    all_dates = np.concatenate([frame.dates for frame in frames])
+    unique, counts = np.unique(all_dates, return_counts=True)
+    common = unique[counts == len(frames)]  # Dates are unique within each cleaned frame
+    closes = np.empty((len(common), len(frames)))
+    for column, frame in enumerate(frames):
+        closes[:, column] = frame['Close'][np.searchsorted(frame.dates, common)]
+    dates = pd.DatetimeIndex(common.view('datetime64[ns]'))
+    tz = frames[0].tz if frames else None
+    return (dates.tz_localize('UTC').tz_convert(tz) if tz is not None else dates), closes
+
+
+def asset_returns(closes):
+    """Per-bar simple returns of a (dates x assets) close array; one row shorter"""
+    returns = closes[1:] / closes[:-1]
+    returns -= 1
+    return returns
+
+
+def portfolio_returns(returns, weights, rebalance=True):
+    """Portfolio return series of a (bars x assets) returns array
+
+    With rebalance the weights are restored every bar (returns @ weights);
+    otherwise the holdings are bought once at the weights and left to drift.
+    """
+    weights = normalize_weights(weights)
+    if rebalance:
+        return returns @ weights
+    growth = returns + 1
+    np.multiply.accumulate(growth, axis=0, out=growth)
+    value = growth @ weights
+    result = np.empty(len(value))
+    result[:1] = value[:1] - 1
+    np.divide(value[1:], value[:-1], out=result[1:])
+    result[1:] -= 1
+    return result
+
+
+def covariance_matrix(returns, periods=252):
+    """Annualized sample covariance matrix of a (bars x assets) returns array"""
+    centered = returns - returns.mean(axis=0)
+    return np.einsum('ti,tj->ij', centered, centered, optimize=True) * (periods / max(len(returns) - 1, 1))
+
+
+def correlation_from_covariance(covariance):
+    """Correlation matrices from covariance matrices (any leading batch dimensions)"""
+    std = np.sqrt(np.einsum('...ii->...i', covariance))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = covariance / (std[..., :, None] * std[..., None, :])
+    return np.clip(correlation, -1, 1, out=correlation)
+
+
+def rolling_covariance(returns, window=COVARIANCE_WINDOW, step=COVARIANCE_STEP, periods=252,
+                       block_bytes=BLOCK_BYTES):
+    """Annualized covariance matrices over rolling windows of a (bars x assets) returns array
+
+    Windows end every step bars, the last one on the last bar. Windows are
+    taken as strided views and processed in blocks of at most block_bytes
+    working memory, each block with one centering pass and one batched einsum
+    (optimize=True, so it runs as a BLAS matrix product).
+    Returns (end row of each window, (windows x assets x assets) array).
+    """
+    n, assets = returns.shape
+    if n < window or window < 2:
+        return np.empty(0, dtype=np.int64), np.empty((0, assets, assets))
+    ends = np.arange(n - 1, window - 2, -step)[::-1]
+    views = np.lib.stride_tricks.sliding_window_view(returns, window, axis=0)  # (n - window + 1) x assets x window
+    covariance = np.empty((len(ends), assets, assets))
+    batch = max(1, block_bytes // (window * assets * 8))
+    for start in range(0, len(ends), batch):
+        block = views[ends[start:start + batch] - (window - 1)]
+        block = block - block.mean(axis=2, keepdims=True)
+        covariance[start:start + batch] = np.einsum('kiw,kjw->kij', block, block, optimize=True)
+    covariance *= periods / (window - 1)
+    return ends, covariance
+
+
+def risk_contributions(covariance, weights, tickers):
+    """Each holding's share of portfolio volatility for an (assets x assets) covariance matrix
+
+    The contribution of holding i is w_i * (covariance @ w)_i / portfolio
+    volatility, so the contributions add up to the portfolio volatility.
+    """
+    weights = normalize_weights(weights)
+    marginal = covariance @ weights
+    variance = weights @ marginal
+    volatility = np.sqrt(variance) if variance > 0 else np.nan
+    contribution = weights * marginal
+    return pd.DataFrame({
+        'Ticker': list(tickers),
+        'Weight': weights,
+        'Volatility': np.sqrt(np.diag(covariance)),
+        'Marginal_Contribution': marginal / volatility,
+        'Risk_Contribution': contribution / volatility,
+        'Pct_Contribution': contribution / variance * 100 if variance > 0 else np.nan
+    })
+
+
+def analyze_portfolio(prices, weights, threshold=20, rebalance=True, window=COVARIANCE_WINDOW,
+                      step=COVARIANCE_STEP, interval='1d', name='Portfolio', **pipeline_options):
+    """Analyze a weighted basket given each holding's raw prices
+
+    prices maps ticker to a Date-indexed OHLCV DataFrame and weights maps
+    the same tickers to weights (normalized to sum to 1). Returns run_pipeline
+    results for the portfolio value curve (name as the ticker; 'df',
+    'volatility', 'drawdowns', 'recovery', 'risk_metrics') plus:
+        'tickers', 'weights'    holdings in column order
+        'dates', 'returns'      common dates and the (bars x assets) returns
+        'portfolio_returns'     portfolio return per bar
+        'covariance', 'correlation'
+                                full-period annualized matrices
+        'rolling_dates', 'rolling_covariance', 'rolling_correlation'
+                                end date and (windows x assets x assets) matrices
+        'contributions'         risk_contributions table
+    """
+    tickers = list(weights)
+    missing = [ticker for ticker in tickers if ticker not in prices]
+    if missing:
+        raise ValueError(f"No prices for: {', '.join(missing)}")
+    w = normalize_weights([weights[ticker] for ticker in tickers])
+    periods = annualization_factor(interval)
+
+    with timed('portfolio_align', rows=sum(len(prices[ticker]) for ticker in tickers)) as info:
+        dates, closes = align_closes({ticker: clean_data(prices[ticker]) for ticker in tickers})
+        info['rows'] = closes.size
+    if len(dates) < 2:
+        raise ValueError("The holdings have fewer than two dates in common")
+
+    with timed('portfolio_returns', rows=closes.size):
+        returns = asset_returns(closes)
+        port_returns = portfolio_returns(returns, w, rebalance=rebalance)
+        nav = np.empty(len(dates))
+        nav[0] = PORTFOLIO_NAV
+        np.cumprod(port_returns + 1, out=nav[1:])
+        nav[1:] *= PORTFOLIO_NAV
+
+    with timed('portfolio_covariance', rows=returns.size):
+        covariance = covariance_matrix(returns, periods)
+        ends, rolling = rolling_covariance(returns, window, step, periods)
+        contributions = risk_contributions(covariance, w, tickers)
+
+    results = run_pipeline(pd.DataFrame({'Close': nav}, index=dates.rename('Date')), name,
+                           threshold=threshold, interval=interval, **pipeline_options)
+    results.update({
+        'tickers': tickers,
+        'weights': w,
+        'dates': dates,
+        'returns': returns,
+        'portfolio_returns': port_returns,
+        'covariance': covariance,
+        'correlation': correlation_from_covariance(covariance),
+        'rolling_dates': dates[ends + 1],  # returns row r is the bar at dates[r + 1]
+        'rolling_covariance': rolling,
+        'rolling_correlation': correlation_from_covariance(rolling),
+        'contributions': contributions
+    })
+    return results
+
+
+def matrix_frame(matrix, tickers):
+    """Label an (assets x assets) matrix with the holdings, e.g. for display or export"""
+    return pd.DataFrame(matrix, index=list(tickers), columns=list(tickers))
+
+
+def portfolio_analyze(weights, threshold=20, rebalance=True, fetch=None, store=None,
+                      download_workers=DOWNLOAD_WORKERS, **options):
+    """Load every holding's prices and analyze the basket
+
+    weights is anything parse_weights accepts. Returns (analyze_portfolio
+    results, {ticker: error}); results is None if any holding failed to load,
+    since the basket would not be the one asked for.
+    """
+    weights = parse_weights(weights)
+    prices, errors = fetch_many(list(weights), fetch=fetch, store=store, max_workers=download_workers,
+                                interval=options.get('interval', '1d'))
+    if errors:
+        return None, errors
+    return analyze_portfolio(prices, weights, threshold=threshold, rebalance=rebalance, **options), errors
@@ -0,0 +1,197 @@
+"""
+Stock RAVA - Prefetch scheduler
+Keeps a list of hot tickers warm so dashboard users never pay for a cold
+download or a full recompute. Each run refreshes every ticker's price history
+in the on-disk store and computes the dashboard's default analysis (metrics,
+tables and rendered panels) into the result cache's spill directory, where
+the app picks it up on its first lookup (see ResultCache.save).
+
+Downloads run in a bounded thread pool and failed tickers are retried with
+exponential backoff. The companion systemd timer (stock-rava-prefetch.timer)
+runs it on a schedule; it can also loop on its own with --every.
+
+Usage:
+    python -m rava_prefetch                                  # STOCK_RAVA_HOT_TICKERS or the defaults
+    python -m rava_prefetch ^GSPC AAPL MSFT --workers 2
+    python -m rava_prefetch --every 1800                     # run every 30 minutes
+    python -m rava_prefetch --fake --store /tmp/rava_store   # offline, with synthetic prices
+
+The app and the prefetcher must share STOCK_RAVA_STORE and
+STOCK_RAVA_RESULT_CACHE (or, with several app replicas, STOCK_RAVA_SHARED_CACHE);
+without a result cache only prices are warmed.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from rava_batch import parse_tickers
+from rava_cache import RESULT_CACHE_DIR, SHARED_CACHE_PATH, ResultCache, make_key
+from rava_core import fetch_history, load_prices
+from rava_render import DASHBOARD_DEFAULTS, analyze_and_render
+from rava_store import PriceStore
+from rava_timing import configure_logging, timed, trace
+
+DEFAULT_HOT_TICKERS = '^GSPC, AAPL, MSFT, GOOGL, TSLA'  # The tickers the dashboard suggests
+HOT_TICKERS = os.environ.get('STOCK_RAVA_HOT_TICKERS', DEFAULT_HOT_TICKERS)
+PREFETCH_WORKERS = 4  # Concurrent upstream downloads
+PREFETCH_ATTEMPTS = 3  # Tries per ticker before giving up until the next run
+BACKOFF_SECONDS = 2.0  # First retry delay; doubled on every further retry (with jitter)
+RESULT_MAX_AGE = 2 * 24 * 3600  # Spilled results older than this are pruned after a run
+
+
+class FakeSource:
+    """Offline stand-in for fetch_history with deterministic synthetic daily bars
+
+    Each ticker gets its own seeded random walk from start to end (default:
+    today), so repeated and incremental fetches agree. The first failures
+    calls raise ConnectionError and every call sleeps latency seconds, to
+    exercise retries and concurrency without a network.
+    """
+
+    def __init__(self, start='1990-01-01', end=None, failures=0, latency=0.0):
+        self.start = pd.Timestamp(start)
+        self.end = pd.Timestamp(end) if end else pd.Timestamp.now().normalize()
+        self.failures = failures
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def history(self, ticker):
+        """Full synthetic history of ticker"""
+        dates = pd.bdate_range(self.start, self.end, name='Date')
+        rng = np.random.default_rng(zlib.crc32(ticker.upper().encode()))
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, len(dates))))
+        spread = np.abs(rng.normal(0, 0.006, len(dates)))
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.003, len(dates))),
+            'High': close * (1 + spread),
+            'Low': close * (1 - spread),
+            'Close': close,
+            'Volume': rng.integers(1_000_000, 10_000_000, len(dates)).astype(np.float64)
+        }, index=dates)
+
+    def __call__(self, ticker, start=None, interval='1d'):
+        with self._lock:
+            self.calls.append((ticker, start))
+            fail = len(self.calls) <= self.failures
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError(f"Simulated network failure fetching {ticker}")
+        if interval != '1d':
+            raise ValueError("FakeSource only serves daily bars")
+        data = self.history(ticker)
+        return data[data.index >= pd.Timestamp(start)] if start else data
+
+
+def backoff_delay(attempt, base=BACKOFF_SECONDS):
+    """Delay before retry number attempt (1, 2, ...): base * 2^(attempt - 1), with 50-100% jitter"""
+    return base * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
+
+
+def warm_ticker(ticker, store, cache, fetch, attempts=PREFETCH_ATTEMPTS, backoff=BACKOFF_SECONDS,
+                params=None, sleep=time.sleep):
+    """Refresh one ticker's stored prices and precompute its dashboard result
+
+    The store entry is refreshed regardless of its age. Returns a status
+    dict: ticker, resolved ticker, rows, attempts, whether a result was
+    cached, seconds and error (None on success).
+    """
+    params = dict(DASHBOARD_DEFAULTS if params is None else params)
+    start = time.perf_counter()
+    status = {'ticker': ticker, 'resolved': None, 'rows': 0, 'attempts': 0, 'result_cached': False, 'error': None}
+    for attempt in range(1, attempts + 1):
+        status['attempts'] = attempt
+        data, resolved, error = load_prices(ticker, store=store, fetch=fetch, interval=params.get('interval', '1d'),
+                                            max_age=0)
+        if not error:
+            break
+        if attempt < attempts:
+            sleep(backoff_delay(attempt, backoff))
+    status['resolved'] = resolved
+
+    if error:
+        status['error'] = error
+    else:
+        status['rows'] = len(data)
+        if cache is not None and (cache.spill_dir or cache.shared is not None):
+            key = make_key(resolved, data, fast_render=True, **params)
+            try:
+                results = analyze_and_render(data, resolved, fast_render=True, **params)
+                status['result_cached'] = cache.save(key, results)
+            except Exception as e:
+                status['error'] = f"Error analyzing data: {e}"
+    status['seconds'] = round(time.perf_counter() - start, 3)
+    return status
+
+
+def prefetch(tickers, store=None, cache=None, fetch=None, max_workers=PREFETCH_WORKERS,
+             attempts=PREFETCH_ATTEMPTS, backoff=BACKOFF_SECONDS, params=None):
+    """Warm every ticker with at most max_workers at a time; returns the status dicts in ticker order"""
+    store = store or PriceStore()
+    fetch = fetch or fetch_history
+    if not tickers:
+        return []
+    with timed('prefetch', rows=len(tickers)), \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tickers)))) as pool:
+        futures = [pool.submit(warm_ticker, ticker, store, cache, fetch, attempts, backoff, params)
+                   for ticker in tickers]
+        statuses = [future.result() for future in futures]
+    if cache is not None:
+        cache.prune(RESULT_MAX_AGE)
+    return statuses
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m rava_prefetch',
+                                     description='Stock RAVA - pre-warm prices and results for hot tickers')
+    parser.add_argument('tickers', nargs='*', help='Tickers to warm (default: STOCK_RAVA_HOT_TICKERS or '
+                                                   f'"{DEFAULT_HOT_TICKERS}")')
+    parser.add_argument('--store', help='Price store directory (default: STOCK_RAVA_STORE or data_store/)')
+    parser.add_argument('--result-cache', default=RESULT_CACHE_DIR,
+                        help='Result cache spill directory shared with the app (default: STOCK_RAVA_RESULT_CACHE)')
+    parser.add_argument('--shared-cache', default=SHARED_CACHE_PATH,
+                        help='SQLite result cache shared with the app replicas (default: STOCK_RAVA_SHARED_CACHE)')
+    parser.add_argument('--workers', type=int, default=PREFETCH_WORKERS,
+                        help='Concurrent downloads (default: %(default)s)')
+    parser.add_argument('--attempts', type=int, default=PREFETCH_ATTEMPTS,
+                        help='Tries per ticker (default: %(default)s)')
+    parser.add_argument('--backoff', type=float, default=BACKOFF_SECONDS,
+                        help='First retry delay in seconds, doubled per retry (default: %(default)s)')
+    parser.add_argument('--every', type=float, metavar='SECONDS', help='Keep running, once every SECONDS')
+    parser.add_argument('--fake', action='store_true', help='Use synthetic offline prices (for testing)')
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    tickers = parse_tickers(','.join(args.tickers)) if args.tickers else parse_tickers(HOT_TICKERS)
+    store = PriceStore(args.store)
+    cache = None
+    if args.result_cache or args.shared_cache:
+        cache = ResultCache(spill_dir=args.result_cache, shared_path=args.shared_cache)
+    else:
+        print("STOCK_RAVA_RESULT_CACHE is not set: warming prices only", file=sys.stderr)
+    fetch = FakeSource() if args.fake else fetch_history
+
+    while True:
+        with trace(mode='prefetch', tickers=len(tickers)):
+            statuses = prefetch(tickers, store=store, cache=cache, fetch=fetch, max_workers=args.workers,
+                                attempts=args.attempts, backoff=args.backoff)
+        for status in statuses:
+            print(json.dumps(status), flush=True)
+        failed = sum(1 for status in statuses if status['error'])
+        if not args.every:
+            return 1 if failed else 0
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""
+Stock RAVA - Fast dashboard rendering
+Renders the five dashboard panels as separate, small PNG images. Line series
+are decimated to the panel's pixel width with min/max bucketing (every peak
+and trough that could be visible is kept), histograms are binned once with
+np.histogram, and figures are drawn with the Agg canvas directly rather than
+through pyplot's global state.
+
+The panels match create_dashboard; it remains the full-resolution path.
+analyze_and_render produces a dashboard result exactly as the app caches it,
+so the prefetcher can compute results the app will serve.
+"""
+import io
+
+import numpy as np
+
+from rava_core import VOLATILITY_WINDOWS, create_dashboard, primary_volatility, run_pipeline, volatility_name
+from rava_timing import timed
+
+FULL_WIDTH_PX = 1600  # Price panel spans the page
+HALF_WIDTH_PX = 800  # Other panels sit two per row
+PANEL_HEIGHT_PX = 400
+RENDER_DPI = 100
+FIGURE_DPI = 200  # Full-resolution dashboard image
+# Analysis settings of a dashboard run with the sidebar left at its defaults
+DASHBOARD_DEFAULTS = {
+    'threshold': 20,
+    'windows': VOLATILITY_WINDOWS,
+    'estimators': ('close',),
+    'ewma_lambdas': (),
+    'dtype': 'float32',
+    'interval': '1d'
+}
+
+
+def minmax_decimate(x, y, buckets):
+    """Reduce (x, y) to at most 2 * buckets points, keeping each bucket's min and max
+
+    NaN values are skipped; the points keep their original order.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= 2 * buckets:
+        keep = np.flatnonzero(np.isfinite(y))
+        return np.asarray(x)[keep], y[keep]
+
+    size = -(-n // buckets)  # ceil(n / buckets)
+    padded = np.full(size * buckets, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    valid = np.isfinite(rows).any(axis=1)
+    offsets = np.arange(buckets) * size
+    low = np.where(np.isfinite(rows), rows, np.inf).argmin(axis=1) + offsets
+    high = np.where(np.isfinite(rows), rows, -np.inf).argmax(axis=1) + offsets
+    keep = np.unique(np.concatenate([low[valid], high[valid]]))
+    return np.asarray(x)[keep], y[keep]
+
+
+def _new_figure(width_px, height_px=PANEL_HEIGHT_PX):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(width_px / RENDER_DPI, height_px / RENDER_DPI), dpi=RENDER_DPI)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _to_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=RENDER_DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def _histogram(ax, values, bins, color):
+    values = np.asarray(values, dtype=np.float64)
+    counts, edges = np.histogram(values[np.isfinite(values)], bins=bins)
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color=color, alpha=0.7, edgecolor='black')
+
+
+def render_price_panel(dates, close, vol_values, vol_name, ticker, width_px=FULL_WIDTH_PX):
+    fig = _new_figure(width_px)
+    ax1 = fig.add_subplot(1, 1, 1)
+    ax1_twin = ax1.twinx()
+    ax1.plot(*minmax_decimate(dates, close, width_px), label=f'{ticker} Price', color='steelblue', linewidth=1.5)
+    ax1_twin.plot(*minmax_decimate(dates, vol_values, width_px), label=vol_name,
+                  color='orange', alpha=0.7, linewidth=1.5)
+    ax1.set_ylabel('Price', fontsize=11, color='steelblue')
+    ax1_twin.set_ylabel('Volatility (%)', fontsize=11, color='orange')
+    ax1.set_title('Price and Volatility Over Time', fontsize=12, fontweight='bold')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper left')
+    ax1_twin.legend(loc='upper right')
+    return _to_png(fig)
+
+
+def render_drawdown_panel(dates, drawdown, width_px=HALF_WIDTH_PX):
+    fig = _new_figure(width_px)
+    ax = fig.add_subplot(1, 1, 1)
+    x, y = minmax_decimate(dates, drawdown, width_px)
+    ax.fill_between(x, y, 0, color='red', alpha=0.3)
+    ax.set_ylabel('Drawdown (%)', fontsize=11)
+    ax.set_title('Drawdown from Peak', fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    return _to_png(fig)
+
+
+def render_volatility_histogram(vol_values, vol_name, width_px=HALF_WIDTH_PX):
+    fig = _new_figure(width_px)
+    ax = fig.add_subplot(1, 1, 1)
+    _histogram(ax, vol_values, 50, 'steelblue')
+    ax.set_xlabel(f'{vol_name} (%)', fontsize=11)
+    ax.set_ylabel('Frequency', fontsize=11)
+    ax.set_title(f'Distribution of {vol_name}', fontsize=12, fontweight='bold')
+    ax.grid(True, axis='y', alpha=0.3)
+    return _to_png(fig)
+
+
+def render_returns_histogram(daily_returns, width_px=HALF_WIDTH_PX):
+    fig = _new_figure(width_px)
+    ax = fig.add_subplot(1, 1, 1)
+    _histogram(ax, np.asarray(daily_returns, dtype=np.float64) * 100, 100, 'green')
+    ax.set_xlabel('Daily Return (%)', fontsize=11)
+    ax.set_ylabel('Frequency', fontsize=11)
+    ax.set_title('Distribution of Daily Returns', fontsize=12, fontweight='bold')
+    ax.grid(True, axis='y', alpha=0.3)
+    return _to_png(fig)
+
+
+def render_recovery_panel(dates, recovery_df, vol_labels, vol_values, width_px=HALF_WIDTH_PX):
+    fig = _new_figure(width_px)
+    ax = fig.add_subplot(1, 1, 1)
+    if len(recovery_df) > 0:
+        ax.scatter(recovery_df['Drawdown_Pct'], recovery_df['Recovery_Months'],
+                   s=100, alpha=0.6, color='red', edgecolors='black')
+        ax.set_xlabel('Drawdown Magnitude (%)', fontsize=11)
+        ax.set_ylabel('Recovery Time (Months)', fontsize=11)
+        ax.set_title('Drawdown vs Recovery Time', fontsize=12, fontweight='bold')
+    else:
+        for i, label in enumerate(vol_labels):
+            ax.plot(*minmax_decimate(dates, vol_values[:, i], width_px),
+                    label=volatility_name(label).replace(' Volatility', ''), alpha=0.7, linewidth=1)
+        ax.set_ylabel('Volatility (%)', fontsize=11)
+        ax.set_title('Rolling Volatility Comparison', fontsize=12, fontweight='bold')
+        ax.legend()
+    ax.grid(True, alpha=0.3)
+    return _to_png(fig)
+
+
+def render_panels(df, recovery_df, volatility, ticker):
+    """Render every dashboard panel independently; returns {panel name: PNG bytes}
+
+    Panel names: 'price', 'drawdown', 'volatility_hist', 'returns_hist', 'recovery'.
+    """
+    vol_labels, vol_values = volatility
+    dates = df['Date'].to_numpy()
+    if vol_labels:
+        primary = primary_volatility(vol_labels)
+        primary_values, primary_name = vol_values[:, primary], volatility_name(vol_labels[primary])
+    else:
+        primary_values, primary_name = np.full(len(df), np.nan), 'Volatility'
+
+    return {
+        'price': render_price_panel(dates, np.asarray(df['Close']), primary_values, primary_name, ticker),
+        'drawdown': render_drawdown_panel(dates, np.asarray(df['Drawdown'])),
+        'volatility_hist': render_volatility_histogram(primary_values, primary_name),
+        'returns_hist': render_returns_histogram(np.asarray(df['Daily_Return'])),
+        'recovery': render_recovery_panel(dates, recovery_df, vol_labels, vol_values)
+    }
+
+
+def analyze_and_render(raw_data, ticker, fast_render=True, **params):
+    """Run the pipeline on raw_data and render its dashboard
+
+    Returns the run_pipeline results with the rendered dashboard added as
+    PNG bytes: 'panels' (render_panels) in fast mode, else 'figure_png'
+    (create_dashboard).
+    """
+    results = run_pipeline(raw_data, ticker, **params)
+    with timed('render', rows=len(results['df'])):
+        if fast_render:
+            results['panels'] = render_panels(results['df'], results['recovery'], results['volatility'], ticker)
+        else:
+            import matplotlib.pyplot as plt
+
+            fig = create_dashboard(results['df'], results['risk_metrics'], ticker, results['recovery'],
+                                   results['volatility'])
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format='png', dpi=FIGURE_DPI, bbox_inches='tight')
+            plt.close(fig)
+            results['figure_png'] = buffer.getvalue()
+    return results
@@ -0,0 +1,451 @@
+"""
+Stock RAVA - Persistent price store
+Keeps full OHLCV history per resolved ticker and bar interval on disk as
+memory-mapped NumPy record arrays, so history survives restarts and only new
+bars have to be downloaded.
+
+Layout (one pair of files per key, under STORE_DIR; the key is the ticker for
+daily bars and TICKER@INTERVAL otherwise, see store_key):
+    <KEY>.npy   structured array: Date (int64 ns), Open, High, Low, Close, Volume;
+                new bars are written into it in place (see PriceStore.append),
+                so it is read under a shared flock on the file itself
+    <KEY>.json  metadata: ticker, rows, first/last date, refreshed_at
+    <KEY>.lock  held while the key is refreshed, so processes sharing the store
+                download each stale history once
+    symbols.json  symbol resolution table: requested ticker -> resolved ticker
+"""
+import io
+import itertools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from rava_timing import record_cache
+
+try:
+    import fcntl
+except ImportError:  # Windows: refreshes are not serialized across processes
+    fcntl = None
+
+STORE_DIR = os.environ.get(
+    'STOCK_RAVA_STORE',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data_store')
+)
+STORE_MAX_AGE = 3600  # Seconds before a stored history is refreshed (matches the download cache ttl)
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+RECORD_DTYPE = np.dtype([('Date', 'i8')] + [(col, 'f8') for col in PRICE_COLUMNS])
+ADJUSTMENT_TOLERANCE = 1e-4  # Relative change in an overlapping close that signals a re-adjusted history
+CHUNK_ROWS = 100_000  # Bars per DataFrame when the stored history is read in chunks
+SYMBOLS_FILE = 'symbols.json'  # Lower case, so it never collides with a ticker's (upper case) metadata file
+
+
+def _write_atomic(root, path, write):
+    os.makedirs(root, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SymbolTable:
+    """Persisted map from a requested ticker to the symbol Yahoo Finance knows it by
+
+    Records which spelling worked (e.g. GSPC -> ^GSPC), so later requests go
+    straight to it instead of probing the plain symbol first. The file is
+    re-read when another process has changed it.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, SYMBOLS_FILE)
+        self._lock = threading.Lock()
+        self._symbols = {}
+        self._mtime = None
+
+    def _reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            try:
+                with open(self.path) as f:
+                    self._symbols = json.load(f)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                pass
+
+    def resolve(self, ticker):
+        """The recorded symbol for ticker, or None if it has not been resolved yet"""
+        with self._lock:
+            self._reload()
+            return self._symbols.get(ticker.upper())
+
+    def record(self, ticker, resolved):
+        """Remember that ticker resolves to resolved (written only if it changed)"""
+        ticker, resolved = ticker.upper(), resolved.upper()
+        with self._lock:
+            self._reload()
+            if self._symbols.get(ticker) == resolved:
+                return
+            self._symbols[ticker] = resolved
+            data = json.dumps(self._symbols, indent=1, sort_keys=True).encode()
+            _write_atomic(self.root, self.path, lambda f: f.write(data))
+            self._mtime = os.path.getmtime(self.path)
+
+
+class PriceStore:
+    """On-disk OHLCV history keyed by resolved ticker"""
+
+    def __init__(self, root=None):
+        self.root = root or STORE_DIR
+        self.symbols = SymbolTable(self.root)
+
+    def _path(self, ticker, ext):
+        safe = re.sub(r'[^A-Z0-9._^=@-]', '_', ticker.upper())
+        return os.path.join(self.root, f"{safe}.{ext}")
+
+    def _write_atomic(self, path, write):
+        _write_atomic(self.root, path, write)
+
+    def __contains__(self, ticker):
+        return os.path.exists(self._path(ticker, 'npy'))
+
+    def metadata(self, ticker):
+        """Return the stored metadata dict, or None if the ticker is not stored"""
+        try:
+            with open(self._path(ticker, 'json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def records(self, ticker):
+        """Memory-map the stored record array (read-only), or None if missing
+
+        append() may shrink the file under the map, so only use the map
+        while holding the key's refresh lock or inside reading().
+        """
+        path = self._path(ticker, 'npy')
+        if not os.path.exists(path):
+            return None
+        return np.load(path, mmap_mode='r')
+
+    @contextmanager
+    def reading(self, ticker):
+        """records(ticker) under a shared lock on the file, which append() takes exclusively to shrink it
+
+        Copy what is needed before leaving the block.
+        """
+        path = self._path(ticker, 'npy')
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            yield None
+            return
+        with f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH)
+            yield np.load(path, mmap_mode='r')
+
+    def load(self, ticker):
+        """Return the stored history as a DataFrame indexed by Date, or None"""
+        with self.reading(ticker) as records:
+            return None if records is None else records_to_frame(records)
+
+    def iter_chunks(self, ticker, rows=CHUNK_ROWS):
+        """Yield the stored history as DataFrames of at most rows bars, read from the memory map one at a time"""
+        start = 0
+        while True:
+            with self.reading(ticker) as records:
+                if records is None or start >= len(records):
+                    return
+                chunk = records_to_frame(records[start:start + rows])
+            yield chunk
+            start += rows
+
+    def has_bars(self, ticker):
+        """True if the ticker is stored with at least one bar"""
+        with self.reading(ticker) as records:
+            return records is not None and len(records) > 0
+
+    def last_date(self, ticker):
+        """Return the date of the last stored bar, or None"""
+        with self.reading(ticker) as records:
+            if records is None or len(records) == 0:
+                return None
+            return pd.Timestamp(int(records['Date'][-1]))
+
+    def is_fresh(self, ticker, max_age=STORE_MAX_AGE, now=None):
+        """True if the ticker was refreshed less than max_age seconds ago"""
+        meta = self.metadata(ticker)
+        if meta is None:
+            return False
+        now = time.time() if now is None else now
+        return now - meta.get('refreshed_at', 0) < max_age
+
+    def save(self, ticker, data):
+        """Replace the stored history for ticker with data; returns the bars stored
+
+        data is a Date-indexed OHLCV DataFrame, or an iterable of them in date
+        order (e.g. a chunked download), written out one at a time.
+        """
+        span = {'rows': 0, 'first': None, 'last': None}
+
+        def write(f):
+            f.write(_npy_header(0))
+            _write_chunks(f, record_chunks(data), span)
+            f.seek(0)
+            f.write(_npy_header(span['rows']))
+
+        self._write_atomic(self._path(ticker, 'npy'), write)
+        self._write_metadata(ticker, span['rows'], span['first'], span['last'])
+        return span['rows']
+
+    def append(self, ticker, data):
+        """Merge newer bars into the stored history; stored bars from the first new date on are replaced
+
+        data is a DataFrame or an iterable of them in date order. The new bars
+        are written into the stored file in place, so the stored history is
+        neither read into memory nor rewritten. After the last bar is flushed,
+        the header (row count) is rewritten and the file truncated, under an
+        exclusive lock on the file: readers map the file inside reading() (or
+        under the refresh lock), so none has it mapped while it shrinks. A file
+        whose header cannot be rewritten in the same length is replaced with a
+        new one (temporary file and os.replace) instead. Call it under the
+        key's refresh lock. If the download fails part way, the bars written
+        so far are kept (the entry stays stale, so the next refresh continues).
+        Returns the bars stored.
+        """
+        chunks = record_chunks(data)
+        first = next(chunks, None)
+        old = self.records(ticker)
+        if old is None:
+            return self.save(ticker, [] if first is None else itertools.chain([first], chunks))
+        first_date = int(old['Date'][0]) if len(old) else None
+        if first is None:
+            last_date = int(old['Date'][-1]) if len(old) else None
+            self._write_metadata(ticker, len(old), first_date, last_date)
+            return len(old)
+        keep = int(np.searchsorted(old['Date'], first['Date'][0]))
+        last_kept = int(old['Date'][keep - 1]) if keep else None
+        del old
+
+        with open(self._path(ticker, 'npy'), 'r+b') as f:
+            header = _read_header(f)
+            if header is None:  # Not written with a growable header: rewrite it once
+                old = np.asarray(self.records(ticker)[:keep])
+                return self.save(ticker, itertools.chain([old, first], chunks))
+            span = {'rows': 0, 'first': None, 'last': last_kept}
+            refreshed = False
+            try:
+                f.seek(len(header) + keep * RECORD_DTYPE.itemsize)
+                _write_chunks(f, itertools.chain([first], chunks), span)
+                refreshed = True
+            finally:
+                rows = keep + span['rows']
+                f.flush()
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                f.seek(0)
+                f.write(_npy_header(rows))
+                f.truncate(len(header) + rows * RECORD_DTYPE.itemsize)
+                f.flush()
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                self._write_metadata(ticker, rows, first_date if keep else span['first'], span['last'],
+                                     refreshed_at=None if refreshed else self._refreshed_at(ticker))
+        return rows
+
+    def _refreshed_at(self, ticker):
+        meta = self.metadata(ticker)
+        return meta.get('refreshed_at', 0) if meta else 0
+
+    def _write_metadata(self, ticker, rows, first_date, last_date, refreshed_at=None):
+        meta = {
+            'ticker': ticker,
+            'rows': int(rows),
+            'first_date': str(pd.Timestamp(first_date).date()) if rows else None,
+            'last_date': str(pd.Timestamp(last_date).date()) if rows else None,
+            'refreshed_at': time.time() if refreshed_at is None else refreshed_at
+        }
+        self._write_atomic(self._path(ticker, 'json'), lambda f: f.write(json.dumps(meta).encode()))
+
+    @contextmanager
+    def lock(self, ticker):
+        """Hold ticker's refresh lock, exclusive across every thread and process using this store"""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._path(ticker, 'lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def touch(self, ticker):
+        """Mark a stored ticker as just refreshed without rewriting its bars"""
+        meta = self.metadata(ticker)
+        if meta is not None:
+            meta['refreshed_at'] = time.time()
+            self._write_atomic(self._path(ticker, 'json'), lambda f: f.write(json.dumps(meta).encode()))
+
+
+def store_key(ticker, interval='1d'):
+    """Key a ticker's history is stored under: the ticker itself for daily bars, else TICKER@INTERVAL"""
+    return ticker if interval == '1d' else f"{ticker}@{interval}"
+
+
+def to_records(data):
+    """Convert a Date-indexed OHLCV DataFrame to a sorted, de-duplicated record array"""
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    records = np.empty(len(data), dtype=RECORD_DTYPE)
+    records['Date'] = index.as_unit('ns').asi8
+    for col in PRICE_COLUMNS:
+        records[col] = data[col].to_numpy(dtype=np.float64) if col in data.columns else np.nan
+    records = records[np.argsort(records['Date'], kind='stable')]
+    # Keep the last row for duplicated dates
+    _, last = np.unique(records['Date'][::-1], return_index=True)
+    return records[len(records) - 1 - last]
+
+
+def record_chunks(data):
+    """Record arrays (see to_records) of each non-empty chunk of data
+
+    data is None, a DataFrame, a record array, or an iterable of DataFrames
+    or record arrays.
+    """
+    if data is None:
+        return iter(())
+    if isinstance(data, (pd.DataFrame, np.ndarray)):
+        data = [data]
+    return (chunk if isinstance(chunk, np.ndarray) else to_records(chunk) for chunk in data if len(chunk))
+
+
+def _npy_header(rows):
+    """.npy header of a rows-long record array; padded like np.save's, so the row count can grow in place"""
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        header, {'descr': np.lib.format.dtype_to_descr(RECORD_DTYPE), 'fortran_order': False, 'shape': (rows,)})
+    return header.getvalue()
+
+
+def _read_header(f):
+    """The header of an open .npy file if appending can rewrite it in place, else None"""
+    try:
+        if np.lib.format.read_magic(f) != (1, 0):
+            return None
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+    except ValueError:
+        return None
+    header = _npy_header(shape[0]) if len(shape) == 1 and not fortran_order and dtype == RECORD_DTYPE else None
+    return header if header is not None and len(header) == f.tell() else None
+
+
+def _write_chunks(f, chunks, span):
+    """Write record chunks to f, skipping bars not after span's last date
+
+    span holds the rows written and the first and last date written; it is
+    updated after every chunk, so it stays current if a later chunk fails.
+    """
+    for records in chunks:
+        if span['last'] is not None:
+            records = records[records['Date'] > span['last']]
+        if not len(records):
+            continue
+        f.write(records.tobytes())
+        span['rows'] += len(records)
+        if span['first'] is None:
+            span['first'] = int(records['Date'][0])
+        span['last'] = int(records['Date'][-1])
+
+
+def records_to_frame(records):
+    """Inverse of to_records"""
+    return pd.DataFrame({col: np.asarray(records[col]) for col in PRICE_COLUMNS},
+                        index=pd.DatetimeIndex(np.asarray(records['Date']).view('datetime64[ns]'), name='Date'))
+
+
+def refresh(store, ticker, fetch, max_age=STORE_MAX_AGE, interval='1d'):
+    """Bring the stored history for ticker up to date, touching the network only for missing bars.
+
+    fetch(ticker, start=None) must return a Date-indexed OHLCV DataFrame, or
+    an iterable of them in date order, which is written to the store chunk
+    by chunk (start=None means full history); for intervals other than '1d'
+    it is also passed interval=. A fresh store entry is left alone. Otherwise bars
+    from the last stored dates onwards are fetched and merged; if the
+    overlapping bar no longer matches (history was re-adjusted for a split or
+    dividend) the full history is fetched again.
+    A stale entry is refreshed under the store's lock for the key, so when
+    several processes want it at once one downloads and the others find it
+    fresh once they get the lock.
+    Returns the store key, or None if the ticker is not stored and fetch
+    returns no data.
+    """
+    key = store_key(ticker, interval)
+    if key in store and store.is_fresh(key, max_age):
+        record_cache('price_store', True)
+        return key
+    with store.lock(key):
+        return _refresh_locked(store, key, ticker, fetch, max_age, interval)
+
+
+def _refresh_locked(store, key, ticker, fetch, max_age, interval):
+    options = {} if interval == '1d' else {'interval': interval}
+    if key in store:
+        fresh = store.is_fresh(key, max_age)
+        record_cache('price_store', fresh)
+        if fresh:
+            return key
+
+        # Re-fetch from the second-to-last bar: the last one may have been a
+        # partial intraday bar, the one before it is final and anchors the merge
+        stored = store.records(key)
+        anchor = int(stored['Date'][-2] if len(stored) > 1 else stored['Date'][-1])
+        anchor_close = float(stored['Close'][-2] if len(stored) > 1 else stored['Close'][-1])
+        new_chunks = record_chunks(fetch(ticker, start=pd.Timestamp(anchor).strftime('%Y-%m-%d'), **options))
+        new_records = next(new_chunks, None)
+        if new_records is None:
+            store.touch(key)
+            return key
+
+        if new_records['Date'][0] == anchor and (
+                abs(new_records['Close'][0] - anchor_close) > ADJUSTMENT_TOLERANCE * abs(anchor_close)):
+            full = record_chunks(fetch(ticker, start=None, **options))
+            first = next(full, None)
+            if first is not None:
+                store.save(key, itertools.chain([first], full))
+                return key
+        store.append(key, itertools.chain([new_records], new_chunks))
+        return key
+
+    record_cache('price_store', False)
+    chunks = record_chunks(fetch(ticker, start=None, **options))
+    first = next(chunks, None)
+    if first is None:
+        return None
+    store.save(key, itertools.chain([first], chunks))
+    return key
+
+
+def load_or_refresh(store, ticker, fetch, max_age=STORE_MAX_AGE, interval='1d'):
+    """Return full history for ticker after refresh(), or None if there is none"""
+    key = refresh(store, ticker, fetch, max_age, interval)
+    return store.load(key) if key else None
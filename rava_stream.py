@@ -0,0 +1,447 @@
+"""
+Stock RAVA - Streaming analysis
+Keeps the state of the analysis pipeline (running max, current drawdown
+episode, rolling-window sums and return moments) so each new daily bar is
+folded in with O(1) work per metric, instead of re-running the pipeline over
+the full history. The state can be snapshotted to JSON and restored, so a
+restarted service resumes where it left off.
+
+Long histories (e.g. years of intraday bars) are ingested a chunk at a time:
+each chunk is cleaned and reduced into the same state with vectorized NumPy
+passes, so memory is bounded by the chunk size and the longest window, not by
+the length of the history.
+
+Values match the batch pipeline: calculate_returns, calculate_volatility,
+calculate_drawdown, find_major_drawdowns, calculate_recovery and
+calculate_risk_metrics.
+
+Usage:
+    analyzer = StreamingAnalyzer.from_history(raw_data)
+    row = analyzer.update({'Date': '2024-06-03', 'Close': 5283.4})
+    analyzer.save('state/^GSPC.json')
+
+    chunks, ticker, error = iter_prices('AAPL', interval='5m')
+    results = analyze_stream(chunks, ticker, interval='5m')
+"""
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from rava_core import (RISK_FREE_RATE, VOLATILITY_WINDOWS, annualization_factor, clean_data,
+                       detect_drawdown_episodes)
+from rava_timing import timed
+
+ENTRY_LEVEL = 0.95  # A drawdown episode starts once the close falls 5% below its peak (as in find_major_drawdowns)
+RESYNC_INTERVAL = 4096  # Updates between exact recomputations of the rolling sums
+
+
+class StreamingAnalyzer:
+    """Incrementally updated risk/volatility state for one ticker"""
+
+    def __init__(self, windows=VOLATILITY_WINDOWS, rf=RISK_FREE_RATE, periods=252):
+        self.windows = sorted({int(w) for w in windows})
+        self.rf = rf
+        self.periods = periods
+        self.rf_period = (1 + rf) ** (1.0 / periods) - 1
+
+        self.last_date = None
+        self.last_close = None
+        self.first_return_date = None
+
+        # Rolling windows: ring buffer of the last max(windows) returns plus
+        # per-window sums of (r - shift) and (r - shift)^2
+        self.buffer = [0.0] * (max(self.windows) if self.windows else 1)
+        self.shift = None
+        self.window_sums = {w: [0.0, 0.0] for w in self.windows}
+        self.since_resync = 0
+
+        # Return moments (Welford) for the risk metrics
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+        self.log_wealth = 0.0
+        self.log_wealth_peak = 0.0
+        self.max_wealth_drawdown = 0.0
+
+        # Price drawdown state (over the rows that have a return)
+        self.running_max = None
+        self.max_drawdown_pct = 0.0
+
+        # Current episode and completed episodes
+        self.peak_date = None
+        self.peak_price = None
+        self.trough_date = None
+        self.trough_price = None
+        self.tie_date = None  # First close back at the peak after the trough
+        self.episodes = []  # [peak_date, peak_price, trough_date, trough_price, recovery_date]
+
+    @classmethod
+    def from_history(cls, raw_data, **kwargs):
+        """Build the state from a raw price history"""
+        analyzer = cls(**kwargs)
+        analyzer.update_chunk(raw_data)
+        return analyzer
+
+    def update(self, bar):
+        """Fold one bar (mapping with 'Date' and 'Close') into the state
+
+        Returns the analysis row for the bar (as calculate_returns,
+        calculate_volatility and calculate_drawdown would produce it), or None
+        for the first bar, a bar without a close, or one not newer than the
+        last bar seen.
+        """
+        date = pd.Timestamp(bar['Date'])
+        close = float(bar['Close'])
+        if math.isnan(close) or (self.last_date is not None and date <= self.last_date):
+            return None
+
+        previous_close = self.last_close
+        self.last_date, self.last_close = date, close
+        if previous_close is None:
+            return None
+
+        daily_return = close / previous_close - 1
+        if self.first_return_date is None:
+            self.first_return_date = date
+        self._update_moments(daily_return)
+        volatility = self._update_windows(daily_return)
+        drawdown = self._update_drawdown(date, close)
+
+        row = {'Date': date, 'Close': close, 'Daily_Return': daily_return}
+        row.update(volatility)
+        row.update(drawdown)
+        return row
+
+    def update_chunk(self, raw_data):
+        """Fold a chunk of bars (a raw price DataFrame) into the state
+
+        Same result as cleaning the chunk and calling update() for each bar,
+        with vectorized passes over the chunk; bars not newer than the last
+        bar seen are skipped. Returns the analysis row for the chunk's last
+        bar, or None if the chunk added no return.
+        """
+        df = clean_data(raw_data)
+        if self.last_date is not None:
+            df = df[int(np.searchsorted(df.dates, self.last_date.value, side='right')):]
+        if len(df) == 0:
+            return None
+
+        dates = df['Date']
+        close = np.asarray(df['Close'], dtype=np.float64)
+        previous_close = self.last_close
+        self.last_date, self.last_close = dates[-1], float(close[-1])
+        if previous_close is None:
+            dates, close, previous = dates[1:], close[1:], close[:-1]
+        else:
+            previous = np.concatenate([[previous_close], close[:-1]])
+        if len(close) == 0:
+            return None
+
+        returns = close / previous - 1
+        if self.first_return_date is None:
+            self.first_return_date = dates[0]
+        self._update_chunk_moments(returns)
+        volatility = self._update_chunk_windows(returns)
+        drawdown = self._update_chunk_drawdown(dates, close)
+
+        row = {'Date': dates[-1], 'Close': float(close[-1]), 'Daily_Return': float(returns[-1])}
+        row.update(volatility)
+        row.update(drawdown)
+        return row
+
+    def _update_chunk_moments(self, returns):
+        # Chan et al. pairwise update of the Welford mean and M2
+        m = len(returns)
+        n = self.count + m
+        chunk_mean = returns.mean()
+        delta = chunk_mean - self.mean
+        self.m2 += float(np.square(returns - chunk_mean).sum()) + delta * delta * self.count * m / n
+        self.mean += float(delta * m / n)
+        self.count = n
+        excess = returns - self.rf_period
+        self.downside_sq += float(np.square(excess[excess < 0]).sum())
+
+        log_wealth = np.cumsum(np.log1p(returns))
+        log_wealth += self.log_wealth
+        peaks = np.maximum.accumulate(np.maximum(log_wealth, self.log_wealth_peak))
+        self.max_wealth_drawdown = min(self.max_wealth_drawdown, float(np.expm1((log_wealth - peaks).min())))
+        self.log_wealth, self.log_wealth_peak = float(log_wealth[-1]), float(peaks[-1])
+
+    def _update_chunk_windows(self, returns):
+        if not self.windows:
+            return {}
+        if self.shift is None:
+            self.shift = float(returns[0])
+        # Only the last len(buffer) returns stay in the ring; the sums are then
+        # recomputed exactly from it
+        size = len(self.buffer)
+        tail = returns[-size:]
+        buffer = np.asarray(self.buffer, dtype=np.float64)
+        buffer[np.arange(self.count - len(tail), self.count) % size] = tail
+        self.buffer = buffer.tolist()
+        self._resync()
+        return self._window_volatility()
+
+    def _update_chunk_drawdown(self, dates, close):
+        # The open episode is fully described by its peak, its trough and the
+        # first close back at the peak; replaying those bars ahead of the
+        # chunk carries it across the chunk boundary
+        prefix = []
+        if self.peak_date is not None:
+            prefix.append((self.peak_date, self.peak_price))
+            if self.trough_date != self.peak_date:
+                prefix.append((self.trough_date, self.trough_price))
+            if self.tie_date is not None:
+                prefix.append((self.tie_date, self.peak_price))
+        k = len(prefix)
+        closes = np.concatenate([[price for _, price in prefix], close])
+        running_max = np.maximum.accumulate(closes)
+
+        def date_at(i):
+            return prefix[i][0] if i < k else dates[i - k]
+
+        episodes = detect_drawdown_episodes(closes, running_max, ENTRY_LEVEL)
+        for peak, trough, end, recovery in zip(episodes['peak_idx'], episodes['trough_idx'], episodes['end_idx'],
+                                               episodes['recovery_idx']):
+            if end >= 0:
+                self.episodes.append([date_at(peak), float(closes[peak]), date_at(trough), float(closes[trough]),
+                                      date_at(recovery)])
+
+        # The last segment (from the last new high) is the open episode
+        new_high = np.flatnonzero(closes[1:] > running_max[:-1])
+        peak = int(new_high[-1]) + 1 if len(new_high) else 0
+        trough = peak + int(np.argmin(closes[peak:]))
+        ties = np.flatnonzero(closes[trough + 1:] >= running_max[trough + 1:])
+        self.peak_date, self.peak_price = date_at(peak), float(closes[peak])
+        self.trough_date, self.trough_price = date_at(trough), float(closes[trough])
+        self.tie_date = date_at(trough + 1 + int(ties[0])) if len(ties) else None
+        self.running_max = float(running_max[-1])
+
+        drawdown = close / running_max[k:]
+        drawdown -= 1
+        drawdown *= 100
+        self.max_drawdown_pct = min(self.max_drawdown_pct, float(drawdown.min()))
+        return {'Drawdown': float(drawdown[-1]), 'Running_Max': self.running_max,
+                'Max_Drawdown': self.max_drawdown_pct}
+
+    def _update_moments(self, r):
+        self.count += 1
+        delta = r - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (r - self.mean)
+        excess = r - self.rf_period
+        if excess < 0:
+            self.downside_sq += excess * excess
+        self.log_wealth += math.log1p(r)
+        self.log_wealth_peak = max(self.log_wealth_peak, self.log_wealth)
+        self.max_wealth_drawdown = min(self.max_wealth_drawdown, math.expm1(self.log_wealth - self.log_wealth_peak))
+
+    def _update_windows(self, r):
+        if not self.windows:
+            return {}
+        if self.shift is None:
+            self.shift = r
+        size = len(self.buffer)
+        slot = (self.count - 1) % size
+        y = r - self.shift
+        for window, sums in self.window_sums.items():
+            sums[0] += y
+            sums[1] += y * y
+            if self.count > window:
+                old = self.buffer[(self.count - 1 - window) % size] - self.shift
+                sums[0] -= old
+                sums[1] -= old * old
+        self.buffer[slot] = r
+
+        self.since_resync += 1
+        if self.since_resync >= RESYNC_INTERVAL:
+            self._resync()
+        return self._window_volatility()
+
+    def _window_volatility(self):
+        values = {}
+        for window, (s1, s2) in self.window_sums.items():
+            if self.count < window:
+                values[f'Volatility_{window}d'] = np.nan
+            else:
+                variance = max((s2 - s1 * s1 / window) / (window - 1), 0.0)
+                values[f'Volatility_{window}d'] = math.sqrt(variance * self.periods) * 100
+        return values
+
+    def _resync(self):
+        """Recompute the rolling sums exactly from the buffer to stop float drift"""
+        size = len(self.buffer)
+        for window, sums in self.window_sums.items():
+            n = min(window, self.count)
+            recent = [self.buffer[(self.count - 1 - k) % size] - self.shift for k in range(n)]
+            sums[0] = math.fsum(recent)
+            sums[1] = math.fsum(y * y for y in recent)
+        self.since_resync = 0
+
+    def _update_drawdown(self, date, close):
+        if self.running_max is None or close > self.running_max:
+            # New high: close out the current episode, start a new one
+            if self.peak_price is not None and self.trough_price < self.peak_price * ENTRY_LEVEL:
+                self.episodes.append([self.peak_date, self.peak_price, self.trough_date, self.trough_price,
+                                      self.tie_date or date])
+            self.running_max = close
+            self.peak_date, self.peak_price = date, close
+            self.trough_date, self.trough_price = date, close
+            self.tie_date = None
+        elif close < self.trough_price:
+            self.trough_date, self.trough_price = date, close
+            self.tie_date = None
+        elif close >= self.running_max and self.tie_date is None and date > self.trough_date:
+            self.tie_date = date
+
+        drawdown = (close / self.running_max - 1) * 100
+        self.max_drawdown_pct = min(self.max_drawdown_pct, drawdown)
+        return {'Drawdown': drawdown, 'Running_Max': self.running_max, 'Max_Drawdown': self.max_drawdown_pct}
+
+    def _major_episodes(self, threshold):
+        """Completed episodes plus the open one, filtered to >= threshold %"""
+        episodes = list(self.episodes)
+        if self.peak_price is not None and self.trough_price < self.peak_price * ENTRY_LEVEL:
+            episodes.append([self.peak_date, self.peak_price, self.trough_date, self.trough_price, self.tie_date])
+        return [e for e in episodes if abs((e[3] - e[1]) / e[1] * 100) >= threshold]
+
+    def drawdowns(self, threshold=20):
+        """Major drawdown table, as find_major_drawdowns"""
+        episodes = self._major_episodes(threshold)
+        return pd.DataFrame({
+            'Peak_Date': pd.DatetimeIndex([e[0] for e in episodes]).as_unit('ns'),
+            'Trough_Date': pd.DatetimeIndex([e[2] for e in episodes]).as_unit('ns'),
+            'Peak_Price': np.array([e[1] for e in episodes], dtype=np.float64),
+            'Trough_Price': np.array([e[3] for e in episodes], dtype=np.float64),
+            'Drawdown_Pct': np.array([(e[3] - e[1]) / e[1] * 100 for e in episodes], dtype=np.float64),
+            'Duration_Days': np.array([(e[2] - e[0]).days for e in episodes], dtype=np.int64),
+            'Status': np.array(['Recovered' if e[4] is not None else 'Open' for e in episodes], dtype=object)
+        })
+
+    def recovery(self, threshold=20):
+        """Recovery table, as calculate_recovery"""
+        episodes = self._major_episodes(threshold)
+        recovery_days = np.array([(e[4] - e[2]).days if e[4] is not None else np.nan for e in episodes],
+                                 dtype=np.float64)
+        return pd.DataFrame({
+            'Drawdown_Pct': np.array([(e[3] - e[1]) / e[1] * 100 for e in episodes], dtype=np.float64),
+            'Drawdown_Duration_Days': np.array([(e[2] - e[0]).days for e in episodes], dtype=np.int64),
+            'Recovery_Days': recovery_days,
+            'Recovery_Months': np.round(recovery_days / 30.44, 1),
+            'Trough_Date': pd.DatetimeIndex([e[2] for e in episodes]).as_unit('ns'),
+            'Recovery_Date': pd.DatetimeIndex([e[4] if e[4] is not None else pd.NaT
+                                               for e in episodes]).as_unit('ns'),
+            'Status': np.array(['Recovered' if e[4] is not None else 'Open' for e in episodes], dtype=object)
+        })
+
+    def risk_metrics(self):
+        """Risk metrics dict, as calculate_risk_metrics"""
+        n = self.count
+        if n == 0:
+            return None
+        wealth = math.exp(self.log_wealth)
+        cagr = wealth ** (self.periods / n) - 1
+        std = math.sqrt(self.m2 / (n - 1)) if n > 1 else np.nan
+        excess_mean = self.mean - self.rf_period
+        downside = math.sqrt(self.downside_sq / n)
+        years = (self.last_date - self.first_return_date).days / 365.25
+        return {
+            'total_return': wealth - 1,
+            'cagr': cagr,
+            'volatility': std * math.sqrt(self.periods),
+            'sharpe': excess_mean / std * math.sqrt(self.periods) if std > 0 else np.nan,
+            'sortino': excess_mean / downside * math.sqrt(self.periods) if downside > 0 else np.nan,
+            'max_drawdown': self.max_wealth_drawdown,
+            'years': years,
+            'excess_return': cagr - self.rf,
+            'risk_free_rate': self.rf
+        }
+
+    def snapshot(self):
+        """JSON-serializable copy of the full state"""
+        def stamp(value):
+            return value.isoformat() if isinstance(value, pd.Timestamp) else value
+
+        state = {key: stamp(value) for key, value in vars(self).items()
+                 if key not in ('episodes', 'window_sums')}
+        state['window_sums'] = {str(w): sums for w, sums in self.window_sums.items()}
+        state['episodes'] = [[stamp(value) for value in episode] for episode in self.episodes]
+        # ISO strings keep only the UTC offset; the time zone restores e.g. America/New_York
+        tz = self.last_date.tz if self.last_date is not None else None
+        state['tz'] = str(tz) if tz is not None else None
+        return state
+
+    @classmethod
+    def restore(cls, state):
+        """Rebuild an analyzer from snapshot()"""
+        analyzer = cls(windows=state['windows'], rf=state['rf'], periods=state['periods'])
+        tz = state.get('tz')
+
+        def timestamp(value):
+            if value is None:
+                return None
+            value = pd.Timestamp(value)
+            return value.tz_convert(tz) if tz else value
+
+        date_keys = ('last_date', 'first_return_date', 'peak_date', 'trough_date', 'tie_date')
+        for key, value in state.items():
+            if key in ('window_sums', 'episodes', 'tz'):
+                continue
+            setattr(analyzer, key, timestamp(value) if key in date_keys else value)
+        analyzer.window_sums = {int(w): list(sums) for w, sums in state['window_sums'].items()}
+        analyzer.episodes = [[timestamp(e[0]), e[1], timestamp(e[2]), e[3], timestamp(e[4])]
+                             for e in state['episodes']]
+        return analyzer
+
+    def save(self, path):
+        """Write snapshot() to a JSON file (atomically)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Restore an analyzer saved with save()"""
+        with open(path) as f:
+            return cls.restore(json.load(f))
+
+
+def ingest(chunks, analyzer=None, **kwargs):
+    """Fold an iterable of raw price chunks (in date order) into an analyzer, one chunk at a time
+
+    chunks may be any generator of DataFrames, e.g. from iter_prices,
+    fetch_chunks, PriceStore.iter_chunks or pd.read_csv(..., chunksize=...);
+    only the current chunk is held in memory. A new StreamingAnalyzer is
+    created from kwargs unless one is given.
+    """
+    analyzer = analyzer or StreamingAnalyzer(**kwargs)
+    for chunk in chunks:
+        with timed('ingest', rows=len(chunk)):
+            analyzer.update_chunk(chunk)
+    return analyzer
+
+
+def analyze_stream(chunks, ticker, threshold=20, windows=VOLATILITY_WINDOWS, interval='1d'):
+    """Bounded-memory counterpart of run_pipeline for long histories
+
+    Returns the 'drawdowns' and 'recovery' tables and 'risk_metrics' as
+    run_pipeline does, with the 'analyzer' state in place of the full
+    per-bar frame.
+    """
+    analyzer = ingest(chunks, windows=windows, periods=annualization_factor(interval))
+    if analyzer.count == 0:
+        raise ValueError(f"Not enough data to analyze {ticker}")
+    return {
+        'ticker': ticker,
+        'analyzer': analyzer,
+        'drawdowns': analyzer.drawdowns(threshold),
+        'recovery': analyzer.recovery(threshold),
+        'risk_metrics': analyzer.risk_metrics()
+    }
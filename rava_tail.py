@@ -0,0 +1,247 @@
+"""
+Stock RAVA - Tail risk
+Historical Value at Risk and Conditional VaR (expected shortfall), over the
+full history and over rolling windows, and a block-bootstrap Monte Carlo
+simulation of forward drawdowns.
+
+Rolling VaR/CVaR keep each window as a sorted list that is updated as the
+window slides (one binary-search delete and insert per bar), so every
+quantile and tail mean is read off the sorted window rather than re-sorting
+it at each step.
+
+The simulation resamples blocks of consecutive historical returns (keeping
+volatility clustering) into paths of a chosen horizon. Paths are generated
+in batches of BATCH_PATHS as 2-D NumPy arrays, each batch with its own RNG
+spawned from one seed, and the batches are spread over a process pool, so
+the results depend only on the seed, not on the number of workers.
+
+Usage:
+    from rava_tail import analyze_tail
+    tail = analyze_tail(results['df']['Daily_Return'], seed=7)
+    tail['var']; tail['simulation']['bands']
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from rava_timing import timed
+
+VAR_LEVELS = (0.95, 0.99)  # Confidence levels
+VAR_WINDOW = 252  # Bars per rolling VaR/CVaR window
+SIMULATION_PATHS = 10_000
+SIMULATION_HORIZON = 252  # Bars simulated forward (one year of daily bars)
+BLOCK_LENGTH = 21  # Bars per resampled block (about a month of daily bars)
+BATCH_PATHS = 1_000  # Paths per RNG batch (the unit of work of a worker)
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+VAR_BLOCK_VALUES = 500_000  # Window values partitioned at a time by rolling_var (4 MB of float64)
+# Simulation workers start from a fresh interpreter, never a fork of the
+# (multi-threaded) app process, which can deadlock on a lock held by another thread
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def _level_label(level):
+    return f"{level * 100:g}"
+
+
+def tail_metrics(returns, levels=VAR_LEVELS):
+    """Full-history VaR and CVaR of a returns array, as positive loss fractions
+
+    VaR at level c is the loss at the (1 - c) quantile of returns (linear
+    interpolation, as np.quantile); CVaR is the mean loss of the worst
+    ceil((1 - c) * n) returns. Non-finite returns are ignored.
+    Returns {'var_95': ..., 'cvar_95': ..., ...}.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[np.isfinite(r)]
+    metrics = {}
+    for level in levels:
+        label = _level_label(level)
+        if len(r) == 0:
+            metrics[f"var_{label}"] = metrics[f"cvar_{label}"] = np.nan
+            continue
+        k = max(1, math.ceil((1 - level) * len(r)))
+        metrics[f"var_{label}"] = -np.quantile(r, 1 - level)
+        metrics[f"cvar_{label}"] = -np.partition(r, k - 1)[:k].mean()
+    return metrics
+
+
+def rolling_var(returns, window=VAR_WINDOW, levels=VAR_LEVELS):
+    """Rolling historical VaR and CVaR (% loss) for several confidence levels
+
+    Definitions are those of tail_metrics, applied to each window of the
+    last window bars. Windows are strided views of the returns, partitioned
+    (np.partition) a block at a time at the deepest order statistic any
+    level needs; only that head of each window is sorted. Non-finite returns
+    count as 0.
+
+    Returns (labels, values) like rolling_volatility: labels 'VaR_95',
+    'CVaR_95', ... and a (rows x len(labels)) array, NaN until a window is
+    full.
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = np.where(np.isfinite(r), r, 0.0)
+    n = len(r)
+    levels = list(levels)
+    labels = [f"VaR_{_level_label(level)}" for level in levels] + [f"CVaR_{_level_label(level)}" for level in levels]
+    values = np.full((n, len(labels)), np.nan)
+    if window < 2 or n < window:
+        return labels, values
+
+    # Interpolation position of each quantile and tail size of each CVaR (fixed for the window)
+    positions = [(window - 1) * (1 - level) for level in levels]
+    lows = [min(int(pos), window - 2) for pos in positions]
+    fractions = [pos - low for pos, low in zip(positions, lows)]
+    tails = [max(1, math.ceil((1 - level) * window)) for level in levels]
+    head = max(max(lows) + 2, max(tails))
+
+    windows = np.lib.stride_tricks.sliding_window_view(r, window)
+    out = values[window - 1:]
+    count = len(levels)
+    block = max(1, VAR_BLOCK_VALUES // window)
+    for start in range(0, len(windows), block):
+        # The head smallest values of each window, in order
+        ordered = np.partition(windows[start:start + block], head - 1, axis=1)[:, :head]
+        ordered.sort(axis=1)
+        rows = out[start:start + block]
+        for i in range(count):
+            low = ordered[:, lows[i]]
+            rows[:, i] = low + fractions[i] * (ordered[:, lows[i] + 1] - low)
+            rows[:, count + i] = ordered[:, :tails[i]].mean(axis=1)
+    values *= -100
+    return labels, values
+
+
+def rolling_var_frame(dates, rolling):
+    """Expand a (labels, values) rolling_var result into a Date-indexed DataFrame, e.g. for export"""
+    labels, values = rolling
+    return pd.DataFrame(values, columns=labels, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+def bootstrap_paths(returns, paths, horizon, block_length, rng):
+    """Circular block bootstrap: a (paths x horizon) array of resampled returns"""
+    n = len(returns)
+    blocks = -(-horizon // block_length)
+    starts = rng.integers(0, n, size=(paths, blocks, 1))
+    index = (starts + np.arange(block_length)).reshape(paths, -1)[:, :horizon]
+    index %= n
+    return returns[index]
+
+
+def path_drawdowns(simulated):
+    """Max drawdown (fraction, <= 0) and recovery time (bars from trough back
+    to the prior peak; inf if not within the horizon) of each simulated path
+
+    Wealth starts at 1 before the first bar, which counts as a prior peak.
+    """
+    wealth = simulated + 1
+    np.multiply.accumulate(wealth, axis=1, out=wealth)
+    peaks = np.maximum(wealth, 1.0)
+    np.maximum.accumulate(peaks, axis=1, out=peaks)
+    drawdown = wealth / peaks
+    drawdown -= 1
+    trough = drawdown.argmin(axis=1)
+    rows = np.arange(len(simulated))
+    max_drawdown = drawdown[rows, trough]
+
+    # First bar after the trough back at the peak the drawdown started from
+    peak_value = peaks[rows, trough]
+    after = np.arange(simulated.shape[1]) > trough[:, None]
+    back = (wealth >= peak_value[:, None]) & after
+    recovered = back.any(axis=1)
+    recovery = np.where(recovered, back.argmax(axis=1) - trough, np.inf)
+    recovery[max_drawdown == 0] = 0
+    return max_drawdown, recovery
+
+
+def _simulate_batch(args):
+    returns, paths, horizon, block_length, seed_sequence = args
+    rng = np.random.default_rng(seed_sequence)
+    return path_drawdowns(bootstrap_paths(returns, paths, horizon, block_length, rng))
+
+
+def simulate_drawdowns(returns, paths=SIMULATION_PATHS, horizon=SIMULATION_HORIZON, block_length=BLOCK_LENGTH,
+                       seed=None, max_workers=None, periods=252, percentiles=BAND_PERCENTILES):
+    """Monte Carlo distribution of forward max drawdown and recovery time
+
+    Paths are block-bootstrapped from the historical returns (non-finite
+    values dropped) in batches of BATCH_PATHS, each with an RNG spawned from
+    seed; max_workers bounds the process pool (default: CPU count, 1 runs
+    inline). The same seed gives the same result for any max_workers.
+
+    Returns a dict with the per-path 'max_drawdown' (fractions) and
+    'recovery_bars' (inf if not recovered within the horizon) arrays and
+    'bands', a table with one row per percentile: Max_Drawdown_Pct (the low
+    percentiles are the worst outcomes), Recovery_Bars and Recovery_Months
+    (NaN where that share of paths has not recovered by the horizon).
+    """
+    r = np.asarray(returns, dtype=np.float64)
+    r = r[np.isfinite(r)]
+    if len(r) < 2:
+        raise ValueError("Need at least two returns to simulate")
+    block_length = max(1, min(block_length, len(r)))
+
+    sizes = [BATCH_PATHS] * (paths // BATCH_PATHS) + ([paths % BATCH_PATHS] if paths % BATCH_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(r, size, horizon, block_length, seed_sequence) for size, seed_sequence in zip(sizes, seeds)]
+
+    with timed('tail_simulation', rows=paths * horizon):
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1 or len(tasks) <= 1:
+            results = [_simulate_batch(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(tasks)),
+                                     mp_context=multiprocessing.get_context(POOL_START_METHOD)) as pool:
+                results = list(pool.map(_simulate_batch, tasks))
+
+    max_drawdown = np.concatenate([result[0] for result in results])
+    recovery = np.concatenate([result[1] for result in results])
+    # 'higher' picks an actual path, so unrecovered (inf) paths never get interpolated
+    recovery_bands = np.percentile(recovery, [100 - p for p in percentiles], method='higher')
+    recovery_bands[~np.isfinite(recovery_bands)] = np.nan
+    bands = pd.DataFrame({
+        'Percentile': list(percentiles),
+        'Max_Drawdown_Pct': np.percentile(max_drawdown, percentiles) * 100,
+        'Recovery_Bars': recovery_bands,
+        'Recovery_Months': np.round(recovery_bands / (periods / 12), 1)
+    })
+    return {
+        'max_drawdown': max_drawdown,
+        'recovery_bars': recovery,
+        'recovered_share': float(np.isfinite(recovery).mean()),
+        'bands': bands
+    }
+
+
+def analyze_tail(returns, dates=None, levels=VAR_LEVELS, window=VAR_WINDOW, paths=SIMULATION_PATHS,
+                 horizon=SIMULATION_HORIZON, block_length=BLOCK_LENGTH, seed=None, max_workers=None, periods=252):
+    """Full-history and rolling VaR/CVaR plus the drawdown simulation for one returns series
+
+    Returns {'metrics': tail_metrics, 'var': table of VaR/CVaR (%) per level,
+    full history and latest window, 'rolling': rolling_var (labels, values)
+    (a DataFrame if dates are given), 'simulation': simulate_drawdowns}.
+    Use paths=0 to skip the simulation.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    with timed('tail_var', rows=len(returns)):
+        metrics = tail_metrics(returns, levels)
+        rolling = rolling_var(returns, window, levels)
+    labels, values = rolling
+    latest = values[-1] if len(values) else np.full(len(labels), np.nan)
+    var_table = pd.DataFrame({
+        'Confidence': [f"{_level_label(level)}%" for level in levels],
+        'VaR_Pct': [metrics[f"var_{_level_label(level)}"] * 100 for level in levels],
+        'CVaR_Pct': [metrics[f"cvar_{_level_label(level)}"] * 100 for level in levels],
+        'Latest_VaR_Pct': latest[:len(levels)],
+        'Latest_CVaR_Pct': latest[len(levels):]
+    })
+    return {
+        'metrics': metrics,
+        'var': var_table,
+        'rolling': rolling_var_frame(dates, rolling) if dates is not None else rolling,
+        'simulation': simulate_drawdowns(returns, paths, horizon, block_length, seed, max_workers,
+                                         periods) if paths else None
+    }
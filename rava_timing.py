@@ -0,0 +1,157 @@
+"""
+Stock RAVA - Stage timing
+Wall time, rows processed and cache hits/misses for each stage of an
+analysis (price loading, the pipeline stages, rendering). Every stage is:
+- logged as a structured key=value line on the 'stock_rava.timing' logger
+  (stderr, so it lands in the journal of stock-rava.service),
+- added to process-wide counters, exported in the Prometheus text format to
+  STOCK_RAVA_METRICS_FILE (e.g. for node_exporter's textfile collector),
+- appended to the current trace, so the dashboard can show the breakdown of
+  the run it just did.
+
+Usage:
+    with trace(ticker='AAPL') as stages:
+        with timed('clean', rows=len(raw_data)):
+            ...
+"""
+import contextvars
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+METRICS_FILE = os.environ.get('STOCK_RAVA_METRICS_FILE')  # Prometheus text file (disabled if unset)
+
+logger = logging.getLogger('stock_rava.timing')
+
+_current_trace = contextvars.ContextVar('stock_rava_trace', default=None)
+
+
+class StageStats:
+    """Thread-safe cumulative per-stage timings and per-cache hit/miss counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}  # stage: {'calls', 'seconds', 'rows', 'last_seconds'}
+        self.caches = {}  # cache: {'hit', 'miss'}
+
+    def record(self, stage, seconds, rows=None):
+        with self._lock:
+            stats = self.stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'rows': 0, 'last_seconds': 0.0})
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['rows'] += rows or 0
+            stats['last_seconds'] = seconds
+
+    def record_cache(self, cache, hit):
+        with self._lock:
+            counts = self.caches.setdefault(cache, {'hit': 0, 'miss': 0})
+            counts['hit' if hit else 'miss'] += 1
+
+    def to_prometheus(self):
+        """Counters in the Prometheus text exposition format"""
+        with self._lock:
+            stages = {stage: dict(stats) for stage, stats in sorted(self.stages.items())}
+            caches = {cache: dict(counts) for cache, counts in sorted(self.caches.items())}
+
+        lines = []
+        for name, kind, key, help_text in [
+            ('stock_rava_stage_seconds_total', 'counter', 'seconds', 'Wall time spent in each analysis stage'),
+            ('stock_rava_stage_calls_total', 'counter', 'calls', 'Times each analysis stage ran'),
+            ('stock_rava_stage_rows_total', 'counter', 'rows', 'Rows processed by each analysis stage'),
+            ('stock_rava_stage_last_seconds', 'gauge', 'last_seconds', 'Wall time of the latest run of each stage')
+        ]:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{stage="{stage}"}} {stats[key]}' for stage, stats in stages.items()]
+        lines += ['# HELP stock_rava_cache_requests_total Cache lookups by result',
+                  '# TYPE stock_rava_cache_requests_total counter']
+        for cache, counts in caches.items():
+            for result in ('hit', 'miss'):
+                lines.append(f'stock_rava_cache_requests_total{{cache="{cache}",result="{result}"}} {counts[result]}')
+        return '\n'.join(lines) + '\n'
+
+
+STATS = StageStats()
+
+
+def _logfmt(value):
+    text = str(value)
+    return f'"{text}"' if not text or any(c in text for c in ' ="') else text
+
+
+def _log(event, fields):
+    logger.info(' '.join([f"event={event}"] + [f"{key}={_logfmt(value)}" for key, value in fields.items()
+                                                 if value is not None]))
+
+
+@contextmanager
+def trace(**labels):
+    """Collect the stages timed inside the block; yields the list of stage dicts
+
+    labels (e.g. ticker) are added to every log line. The Prometheus file
+    is rewritten when the block ends.
+    """
+    stages = []
+    token = _current_trace.set((stages, labels))
+    start = time.perf_counter()
+    try:
+        yield stages
+    finally:
+        _current_trace.reset(token)
+        _log('run', dict(labels, seconds=f"{time.perf_counter() - start:.4f}", stages=len(stages)))
+        write_metrics()
+
+
+@contextmanager
+def timed(stage, rows=None):
+    """Time the block as stage; yields a dict whose 'rows' may be set inside the block"""
+    info = {'stage': stage, 'rows': rows}
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        info['seconds'] = time.perf_counter() - start
+        STATS.record(stage, info['seconds'], info['rows'])
+        current = _current_trace.get()
+        labels = current[1] if current else {}
+        if current:
+            current[0].append(info)
+        _log('stage', dict(labels, stage=stage, seconds=f"{info['seconds']:.4f}", rows=info['rows']))
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup, attributed to the innermost trace"""
+    STATS.record_cache(cache, hit)
+    current = _current_trace.get()
+    if current:
+        current[0].append({'stage': f"{cache}_cache", 'cache': 'hit' if hit else 'miss', 'seconds': 0.0,
+                           'rows': None})
+    _log('cache', dict(current[1] if current else {}, cache=cache, result='hit' if hit else 'miss'))
+
+
+def write_metrics(path=None):
+    """Write the Prometheus text file (atomically); no-op unless a path is configured"""
+    path = path or METRICS_FILE
+    if not path:
+        return
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(STATS.to_prometheus())
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def configure_logging(level=logging.INFO):
+    """Send the timing log lines to stderr (the journal under systemd)"""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(asctime)s %(name)s %(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
@@ -0,0 +1,13 @@
+from rava_batch import batch_analyze
+from rava_prefetch import FakeSource
+from rava_store import PriceStore
+
+
+def test_batch_analyze_in_worker_processes_matches_inline(tmp_path):
+    store, fetch = PriceStore(str(tmp_path / 'store')), FakeSource('2015-01-01', '2024-01-01')
+    inline, errors = batch_analyze(['AAPL', 'MSFT', 'TSLA'], fetch=fetch, store=store, max_workers=1)
+    pooled, pooled_errors = batch_analyze(['AAPL', 'MSFT', 'TSLA'], fetch=fetch, store=store, max_workers=2)
+
+    assert errors == pooled_errors == {}
+    assert list(pooled['Ticker']) == list(inline['Ticker'])
+    assert pooled['Sharpe'].tolist() == inline['Sharpe'].tolist()
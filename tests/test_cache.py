@@ -0,0 +1,30 @@
+from rava_cache import ResultCache, key_digest, make_key
+from rava_prefetch import FakeSource
+
+PARAMS = {'threshold': 20, 'windows': (30, 60, 252)}
+
+
+def history():
+    return FakeSource('2020-01-01', '2024-01-01').history('AAPL')
+
+
+def test_same_history_gives_same_key():
+    assert key_digest(make_key('aapl', history(), **PARAMS)) == key_digest(make_key('AAPL', history(), **PARAMS))
+
+
+def test_rewritten_last_bar_gives_new_key():
+    data = history()
+    refreshed = data.copy()
+    refreshed.iloc[-1, refreshed.columns.get_loc('Close')] *= 1.001  # Today's partial bar, later in the session
+
+    assert make_key('AAPL', refreshed, **PARAMS) != make_key('AAPL', data, **PARAMS)
+
+
+def test_readjusted_history_gives_new_key():
+    data = history()
+    adjusted = data.copy()
+    adjusted[['Open', 'High', 'Low', 'Close']] *= 0.98  # Dividend adjustment of every earlier bar
+
+    cache = ResultCache(spill_dir=None, shared_path=None)
+    cache.put(make_key('AAPL', data, **PARAMS), {'stale': True})
+    assert cache.get(make_key('AAPL', adjusted, **PARAMS)) is None
@@ -0,0 +1,18 @@
+import pytest
+
+from rava_cli import main
+
+
+@pytest.mark.parametrize('options, message', [
+    (['--windows', '0'], '--windows needs at least one window'),
+    (['--windows', '30,1'], '--windows needs at least one window'),
+    (['--windows', '30,x'], '--windows must be comma-separated whole numbers'),
+    (['--estimators', 'close,yang_zhang'], 'unknown --estimators yang_zhang'),
+    (['--estimators', ','], 'unknown --estimators (none)'),
+])
+def test_bad_volatility_options_are_rejected(options, message, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        main(['AAPL'] + options)
+
+    assert exit_info.value.code == 2
+    assert message in capsys.readouterr().err
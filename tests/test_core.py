@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+import rava_core
+from rava_core import bar_start, calculate_recovery, find_major_drawdowns, run_pipeline
+
+
+def intraday_prices(closes, tz='America/New_York'):
+    """5-minute bars with a tz-aware Date index"""
+    dates = pd.date_range('2024-01-02 09:30', periods=len(closes), freq='5min', tz=tz, name='Date')
+    closes = np.asarray(closes, dtype=np.float64)
+    return pd.DataFrame({'Open': closes, 'High': closes, 'Low': closes, 'Close': closes, 'Volume': 1e5},
+                        index=dates)
+
+
+def test_recovery_keeps_timezone_of_intraday_dates():
+    # A 30% drawdown that recovers, then a 25% one that is still open
+    closes = np.concatenate([np.linspace(100, 70, 20), np.linspace(70, 110, 20), np.linspace(110, 82, 20)])
+    results = run_pipeline(intraday_prices(closes), 'TZ', interval='5m')
+
+    recovery = results['recovery']
+    assert list(recovery['Status']) == ['Recovered', 'Open']
+    assert str(recovery['Recovery_Date'].dt.tz) == 'America/New_York'
+    assert recovery['Recovery_Date'].iloc[0] > recovery['Trough_Date'].iloc[0]
+    assert pd.isna(recovery['Recovery_Date'].iloc[1])
+    assert np.isnan(recovery['Recovery_Days'].iloc[1])
+    assert list(results['drawdowns']['Status']) == ['Recovered', 'Open']
+
+
+def test_pipeline_detects_drawdown_episodes_once(monkeypatch):
+    closes = np.concatenate([np.linspace(100, 70, 20), np.linspace(70, 110, 20), np.linspace(110, 82, 20)])
+    scans = []
+    major_episodes = rava_core._major_episodes
+
+    def counted(*args, **kwargs):
+        scans.append(args)
+        return major_episodes(*args, **kwargs)
+    monkeypatch.setattr(rava_core, '_major_episodes', counted)
+
+    results = run_pipeline(intraday_prices(closes), 'TZ', interval='5m')
+    assert len(scans) == 1
+
+    df = results['df']
+    pd.testing.assert_frame_equal(results['drawdowns'], find_major_drawdowns(df))
+    pd.testing.assert_frame_equal(results['recovery'], calculate_recovery(df['Date'], df['Close'], df['Running_Max']))
+
+
+def test_bar_start_floors_to_the_interval():
+    start = '2024-03-06 10:47'  # A Wednesday
+    assert bar_start(start, '1d') == pd.Timestamp('2024-03-06')
+    assert bar_start(start, '1wk') == pd.Timestamp('2024-03-04')
+    assert bar_start(start, '5m') == pd.Timestamp('2024-03-06 10:45')
+    assert bar_start(start, '1h') == pd.Timestamp('2024-03-06 10:00')
+    assert bar_start(None, '1d') is None
@@ -0,0 +1,20 @@
+import pytest
+
+from rava_portfolio import parse_weights
+
+
+def test_unweighted_tickers_share_the_remainder():
+    assert parse_weights('AAPL:0.4, MSFT, googl') == {'AAPL': 0.4, 'MSFT': 0.3, 'GOOGL': 0.3}
+    assert parse_weights('AAPL, MSFT') == {'AAPL': 0.5, 'MSFT': 0.5}
+
+
+@pytest.mark.parametrize('text', ['AAPL:0.6, MSFT:0.4, GOOGL', 'AAPL:0.7, MSFT:0.2, TSLA:0.1, GOOGL',
+                                  'AAPL:120%, MSFT'])
+def test_unweighted_tickers_with_nothing_left_are_rejected(text):
+    with pytest.raises(ValueError, match='leaving nothing'):
+        parse_weights(text)
+
+
+def test_bad_weight_is_rejected():
+    with pytest.raises(ValueError, match="Invalid weight 'abc' for AAPL"):
+        parse_weights('AAPL:abc')
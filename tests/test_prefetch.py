@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from rava_cache import ResultCache, make_key
+from rava_core import load_prices
+from rava_prefetch import FakeSource, backoff_delay, prefetch, warm_ticker
+from rava_render import DASHBOARD_DEFAULTS
+from rava_store import PriceStore
+
+START_DATE, END_DATE = '2018-01-01', '2024-01-01'  # A short history keeps the analysis quick
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'store'))
+
+
+def test_backoff_doubles_with_jitter():
+    for attempt in range(1, 5):
+        delay = backoff_delay(attempt, base=2.0)
+        assert 2.0 * 2 ** (attempt - 1) * 0.5 <= delay <= 2.0 * 2 ** (attempt - 1)
+
+
+def test_warm_ticker_retries_with_backoff(store):
+    fetch = FakeSource(START_DATE, END_DATE, failures=2)
+    sleeps = []
+    status = warm_ticker('AAPL', store, None, fetch, attempts=3, backoff=1.0, sleep=sleeps.append)
+
+    assert status['error'] is None and status['attempts'] == 3
+    assert status['rows'] == len(fetch.history('AAPL'))
+    assert len(sleeps) == 2
+    assert 0.5 <= sleeps[0] <= 1.0 and 1.0 <= sleeps[1] <= 2.0
+    assert store.has_bars('AAPL')
+
+
+def test_warm_ticker_gives_up_after_attempts(store):
+    fetch = FakeSource(START_DATE, END_DATE, failures=10)
+    sleeps = []
+    status = warm_ticker('AAPL', store, None, fetch, attempts=2, backoff=1.0, sleep=sleeps.append)
+
+    assert status['attempts'] == 2 and len(fetch.calls) == 2
+    assert 'Simulated network failure' in status['error']
+    assert len(sleeps) == 1 and status['rows'] == 0
+    assert 'AAPL' not in store
+
+
+def test_warmed_result_is_spilled_for_the_app(store, tmp_path):
+    spill_dir = str(tmp_path / 'results')
+    cache = ResultCache(spill_dir=spill_dir, shared_path=None)
+    status = warm_ticker('AAPL', store, cache, FakeSource(START_DATE, END_DATE), sleep=lambda _: None)
+    assert status['error'] is None and status['result_cached']
+    assert len(os.listdir(spill_dir)) == 1
+
+    # The app, in another process: prices from the store, the result from the spill directory
+    fetch = FakeSource(START_DATE, END_DATE)
+    data, resolved, _ = load_prices('AAPL', store=PriceStore(store.root), fetch=fetch)
+    app_cache = ResultCache(spill_dir=spill_dir, shared_path=None)
+    results = app_cache.get(make_key(resolved, data, fast_render=True, **DASHBOARD_DEFAULTS))
+
+    assert results is not None and results['ticker'] == 'AAPL'
+    assert fetch.calls == [] and app_cache.stats()['disk_hits'] == 1
+
+
+def test_evicted_results_spill_to_disk(tmp_path):
+    cache = ResultCache(max_entries=1, spill_dir=str(tmp_path), shared_path=None)
+    cache.put('first', {'value': 1})
+    cache.put('second', {'value': 2})
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.get('first') == {'value': 1}
+    assert cache.stats()['disk_hits'] == 1
+
+
+def test_prune_removes_old_spilled_results(tmp_path):
+    cache = ResultCache(spill_dir=str(tmp_path), shared_path=None)
+    cache.save('old', {'value': 1})
+    cache.save('new', {'value': 2})
+    old_path = cache._spill_path('old')
+    os.utime(old_path, (time.time() - 3600, time.time() - 3600))
+
+    assert cache.prune(max_age=60) == 1
+    assert not os.path.exists(old_path) and os.path.exists(cache._spill_path('new'))
+
+
+def test_prefetch_reports_every_ticker_in_order(store):
+    fetch = FakeSource(START_DATE, END_DATE, failures=1)
+    statuses = prefetch(['AAPL', 'MSFT'], store=store, fetch=fetch, max_workers=1, backoff=0.0)
+
+    assert [status['ticker'] for status in statuses] == ['AAPL', 'MSFT']
+    assert [status['attempts'] for status in statuses] == [2, 1]
+    assert all(status['error'] is None for status in statuses)
@@ -0,0 +1,47 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rava_core import RISK_FREE_RATE, calculate_drawdown, calculate_return_metrics
+
+TOLERANCE = 1e-9
+
+
+def synthetic_returns(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.012, rows)
+    dates = pd.bdate_range('1957-03-04', periods=rows + 1)
+    # Prices include the base day so the total return spans every return
+    prices = pd.Series(100 * np.concatenate([[1.0], np.cumprod(1 + returns)]), index=dates)
+    return prices, pd.Series(returns, index=dates[1:])
+
+
+@pytest.mark.parametrize('rows', [1_000, 17_000])
+def test_return_metrics_match_quantstats(rows):
+    qs = pytest.importorskip('quantstats')
+    _, returns = synthetic_returns(rows)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        expected = {
+            'total_return': qs.stats.comp(returns),
+            'cagr': qs.stats.cagr(returns),
+            'volatility': qs.stats.volatility(returns, periods=252),
+            'sharpe': qs.stats.sharpe(returns, rf=RISK_FREE_RATE, periods=252),
+            'sortino': qs.stats.sortino(returns, rf=RISK_FREE_RATE, periods=252),
+            'max_drawdown': qs.stats.max_drawdown(returns)
+        }
+
+    actual = calculate_return_metrics(returns.to_numpy(), rf=RISK_FREE_RATE, periods=252)
+    for key, value in expected.items():
+        assert actual[key] == pytest.approx(value, rel=TOLERANCE), key
+
+
+def test_drawdown_matches_ffn():
+    ffn = pytest.importorskip('ffn')
+    prices, _ = synthetic_returns(17_000)
+
+    df = calculate_drawdown(pd.DataFrame({'Date': prices.index, 'Close': prices.to_numpy()}))
+    expected = ffn.to_drawdown_series(prices).to_numpy() * 100
+    assert np.abs(df['Drawdown'].to_numpy() - expected).max() <= TOLERANCE
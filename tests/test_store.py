@@ -0,0 +1,216 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rava_core import UPSTREAM, load_prices
+from rava_prefetch import FakeSource
+from rava_store import PriceStore
+
+END_DATE = '2024-01-01'
+
+
+class CaretOnlySource(FakeSource):
+    """Knows tickers only by their '^'-prefixed (index) symbol"""
+
+    def __call__(self, ticker, start=None, interval='1d'):
+        data = super().__call__(ticker, start, interval)
+        return data if ticker.startswith('^') else data.iloc[:0]
+
+
+class AdjustedSource(FakeSource):
+    """History re-adjusted upstream (e.g. for a split): every price scaled by factor"""
+
+    def __init__(self, factor, **kwargs):
+        super().__init__(**kwargs)
+        self.factor = factor
+
+    def history(self, ticker):
+        data = super().history(ticker)
+        data[['Open', 'High', 'Low', 'Close']] *= self.factor
+        return data
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PriceStore(str(tmp_path / 'store'))
+
+
+def assert_same_bars(data, expected):
+    assert np.array_equal(data.index.to_numpy(), expected.index.to_numpy())
+    assert np.allclose(data['Close'].to_numpy(), expected['Close'].to_numpy())
+
+
+def test_cold_fetch_downloads_full_history(store):
+    fetch = FakeSource(end=END_DATE)
+    data, resolved, error = load_prices('AAPL', store=store, fetch=fetch)
+
+    assert error is None and resolved == 'AAPL'
+    assert fetch.calls == [('AAPL', None)]
+    assert_same_bars(data, fetch.history('AAPL'))
+    assert store.metadata('AAPL')['rows'] == len(data)
+
+
+def test_warm_start_makes_no_upstream_calls(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end=END_DATE))
+
+    restarted, fetch = PriceStore(store.root), FakeSource(end=END_DATE)  # As after a restart
+    data, resolved, error = load_prices('AAPL', store=restarted, fetch=fetch)
+
+    assert error is None and resolved == 'AAPL'
+    assert fetch.calls == []
+    assert_same_bars(data, fetch.history('AAPL'))
+
+
+def test_stale_history_appends_only_new_bars(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-12-01'))
+    anchor = store.records('AAPL')['Date'][-2]
+
+    fetch = FakeSource(end=END_DATE)
+    data, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert error is None
+    assert fetch.calls == [('AAPL', pd.Timestamp(anchor).strftime('%Y-%m-%d'))]
+    assert_same_bars(data, fetch.history('AAPL'))
+
+
+def test_readjusted_history_is_fetched_again_in_full(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-12-01'))
+
+    fetch = AdjustedSource(0.5, end=END_DATE)
+    data, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert error is None
+    assert len(fetch.calls) == 2 and fetch.calls[1] == ('AAPL', None)
+    assert_same_bars(data, fetch.history('AAPL'))
+
+
+def test_caret_fallback_is_resolved_once(store):
+    fetch = CaretOnlySource(end=END_DATE)
+    data, resolved, error = load_prices('FOO', store=store, fetch=fetch)
+
+    assert error is None and resolved == '^FOO'
+    assert fetch.calls == [('FOO', None), ('^FOO', None)]
+    assert store.symbols.resolve('FOO') == '^FOO'
+    assert_same_bars(data, fetch.history('^FOO'))
+
+    # The recorded symbol is used directly: no probe of the plain symbol
+    fetch = CaretOnlySource(end=END_DATE)
+    _, resolved, error = load_prices('FOO', store=store, fetch=fetch, max_age=0)
+    assert error is None and resolved == '^FOO'
+    assert [ticker for ticker, _ in fetch.calls] == ['^FOO']
+
+
+def test_unknown_ticker_reports_error(store):
+    fetch = FakeSource(end=END_DATE, failures=2)  # Both 'NOPE' and the '^NOPE' fallback fail
+    data, resolved, error = load_prices('NOPE', store=store, fetch=fetch)
+
+    assert data is None and resolved == 'NOPE'
+    assert 'Simulated network failure' in error
+    assert 'NOPE' not in store and '^NOPE' not in store
+
+
+def test_concurrent_loads_share_one_refresh(store):
+    fetch = FakeSource(end=END_DATE, latency=0.3)  # Slow enough for the loads to overlap
+    coalesced = UPSTREAM.stats()['coalesced']
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        loaded = list(pool.map(lambda _: load_prices('AAPL', store=store, fetch=fetch, max_age=0), range(4)))
+
+    assert fetch.calls == [('AAPL', None)]
+    assert UPSTREAM.stats()['coalesced'] - coalesced == 3
+    for data, resolved, error in loaded:
+        assert error is None and resolved == 'AAPL'
+        assert_same_bars(data, fetch.history('AAPL'))
+
+
+class ChunkedSource(FakeSource):
+    """Serves history as a stream of chunks, like an intraday download; fails after fail_after chunks"""
+
+    def __init__(self, rows=250, fail_after=None, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.fail_after = fail_after
+
+    def __call__(self, ticker, start=None, interval='1d'):
+        data = super().__call__(ticker, start, interval)
+        for i, begin in enumerate(range(0, len(data), self.rows)):
+            if i == self.fail_after:
+                raise ConnectionError("Simulated failure part way through a download")
+            yield data.iloc[begin:begin + self.rows]
+
+
+def test_chunked_download_is_streamed_into_the_store(store):
+    fetch = ChunkedSource(end=END_DATE)
+    data, _, error = load_prices('AAPL', store=store, fetch=fetch)
+
+    assert error is None
+    assert_same_bars(data, fetch.history('AAPL'))
+    assert store.metadata('AAPL')['last_date'] == END_DATE
+
+
+def test_append_writes_into_the_stored_file_in_place(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-06-01'))
+    path = store._path('AAPL', 'npy')
+    inode, size = os.stat(path).st_ino, os.path.getsize(path)
+
+    fetch = ChunkedSource(rows=20, end=END_DATE)
+    data, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert error is None
+    assert os.stat(path).st_ino == inode and os.path.getsize(path) > size
+    assert_same_bars(data, fetch.history('AAPL'))
+    assert np.array_equal(np.load(path), store.records('AAPL'))
+    assert store.metadata('AAPL')['rows'] == len(data)
+
+
+def test_failed_append_keeps_the_bars_written(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-06-01'))
+    stored, refreshed_at = len(store.records('AAPL')), store.metadata('AAPL')['refreshed_at']
+
+    fetch = ChunkedSource(rows=20, fail_after=2, end=END_DATE)
+    _, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert 'part way' in error
+    records = store.records('AAPL')
+    assert len(records) == stored - 2 + 40  # Two chunks from the anchor bar on
+    assert np.all(np.diff(records['Date']) > 0)
+    assert store.metadata('AAPL')['rows'] == len(records)
+    assert store.metadata('AAPL')['refreshed_at'] == refreshed_at  # Still stale: the next refresh carries on
+
+    data, _, error = load_prices('AAPL', store=store, fetch=ChunkedSource(rows=20, end=END_DATE), max_age=0)
+    assert error is None
+    assert_same_bars(data, fetch.history('AAPL'))
+
+
+def stored_bytes(store, ticker):
+    """Header plus rows of a stored .npy file: its size with no stale bytes after the data"""
+    header = 192  # np.save's (growable) header for the record dtype
+    return header + len(store.records(ticker)) * store.records(ticker).dtype.itemsize
+
+
+def test_append_truncates_stale_bytes_after_the_data(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-06-01'))
+    path = store._path('AAPL', 'npy')
+    with open(path, 'ab') as f:
+        f.write(b'\xff' * 1000)  # Left behind, e.g. by an older writer
+
+    fetch = ChunkedSource(rows=20, end=END_DATE)
+    data, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert error is None
+    assert_same_bars(data, fetch.history('AAPL'))
+    assert os.path.getsize(path) == stored_bytes(store, 'AAPL')
+
+
+def test_failed_append_shrinks_the_file_to_the_bars_kept(store):
+    load_prices('AAPL', store=store, fetch=FakeSource(end='2023-06-01'))
+    stored = len(store.records('AAPL'))
+
+    fetch = ChunkedSource(rows=1, fail_after=1, end=END_DATE)  # Fails after the anchor bar
+    _, _, error = load_prices('AAPL', store=store, fetch=fetch, max_age=0)
+
+    assert 'part way' in error
+    assert len(store.records('AAPL')) == stored - 1  # The bar after the anchor was not written again
+    assert os.path.getsize(store._path('AAPL', 'npy')) == stored_bytes(store, 'AAPL')
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rava_core import run_pipeline
+from rava_prefetch import FakeSource
+from rava_stream import StreamingAnalyzer
+
+THRESHOLD = 10  # Low enough that the synthetic history has several episodes, one still open
+RTOL = 1e-9
+
+
+@pytest.fixture(scope='module')
+def prices():
+    data = FakeSource('2012-01-02', '2020-01-01').history('STREAM')
+    # A 35% crash that recovers, so the tables are not only small dips
+    crash = np.ones(len(data))
+    crash[900:960] = np.linspace(1, 0.65, 60)
+    crash[960:1100] = np.linspace(0.65, 1, 140)
+    data[['Open', 'High', 'Low', 'Close']] *= crash[:, None]
+    return data
+
+
+@pytest.fixture(scope='module')
+def expected(prices):
+    return run_pipeline(prices, 'STREAM', threshold=THRESHOLD)
+
+
+def assert_matches_pipeline(analyzer, expected):
+    assert len(expected['drawdowns']) > 1
+    pd.testing.assert_frame_equal(analyzer.drawdowns(THRESHOLD), expected['drawdowns'],
+                                  check_dtype=False, rtol=RTOL)
+    pd.testing.assert_frame_equal(analyzer.recovery(THRESHOLD), expected['recovery'],
+                                  check_dtype=False, rtol=RTOL)
+    metrics = analyzer.risk_metrics()
+    for key, value in expected['risk_metrics'].items():
+        assert metrics[key] == pytest.approx(value, rel=RTOL), key
+
+
+def bars(prices):
+    return [{'Date': date, 'Close': close} for date, close in prices['Close'].items()]
+
+
+def test_update_bar_by_bar_matches_pipeline(prices, expected):
+    analyzer = StreamingAnalyzer()
+    for bar in bars(prices):
+        row = analyzer.update(bar)
+    assert_matches_pipeline(analyzer, expected)
+
+    labels, values = expected['volatility']
+    for i, label in enumerate(labels):
+        assert row[label] == pytest.approx(float(values[-1, i]), rel=1e-6), label  # float32 in the pipeline
+
+
+def test_update_chunk_with_uneven_chunks_matches_pipeline(prices, expected):
+    analyzer = StreamingAnalyzer()
+    edges = [0, 1, 2, 7, 300, 301, 950, 1500, len(prices)]
+    for start, end in zip(edges[:-1], edges[1:]):
+        analyzer.update_chunk(prices.iloc[start:end])
+    assert_matches_pipeline(analyzer, expected)
+
+
+def test_snapshot_restore_mid_series_matches_pipeline(prices, expected):
+    analyzer = StreamingAnalyzer()
+    analyzer.update_chunk(prices.iloc[:930])  # Stopped during the crash, with an episode open
+    restored = StreamingAnalyzer.restore(json.loads(json.dumps(analyzer.snapshot())))
+    for bar in bars(prices.iloc[930:1200]):
+        restored.update(bar)
+    restored.update_chunk(prices.iloc[1200:])
+    assert_matches_pipeline(restored, expected)
+
+
+def test_empty_chunk_and_stale_bars_are_ignored(prices, expected):
+    analyzer = StreamingAnalyzer()
+    assert analyzer.update_chunk(prices.iloc[:0]) is None
+    analyzer.update_chunk(prices.iloc[:1000])
+    state = json.dumps(analyzer.snapshot())
+
+    assert analyzer.update_chunk(prices.iloc[:0]) is None
+    last = prices.index[999]
+    assert analyzer.update({'Date': last, 'Close': 1.0}) is None  # Same date as the last bar
+    assert analyzer.update({'Date': last - pd.Timedelta(days=3), 'Close': 1.0}) is None
+    assert analyzer.update_chunk(prices.iloc[500:1000]) is None  # Nothing newer than the last bar
+    assert json.dumps(analyzer.snapshot()) == state
+
+    analyzer.update_chunk(prices.iloc[900:])  # Overlapping chunk: only the new bars count
+    assert_matches_pipeline(analyzer, expected)
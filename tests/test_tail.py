@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rava_tail import rolling_var, simulate_drawdowns
+
+
+def test_simulation_in_worker_processes_matches_inline():
+    returns = np.random.default_rng(3).normal(0.0003, 0.012, 2_000)
+    inline = simulate_drawdowns(returns, paths=2_500, horizon=60, seed=11, max_workers=1)
+    pooled = simulate_drawdowns(returns, paths=2_500, horizon=60, seed=11, max_workers=2)
+
+    assert np.array_equal(inline['max_drawdown'], pooled['max_drawdown'])
+    assert np.array_equal(inline['recovery_bars'], pooled['recovery_bars'])
+
+
+@pytest.mark.parametrize('window', [2, 21, 252])
+def test_rolling_var_matches_pandas_rolling_quantile(window):
+    returns = np.random.default_rng(5).standard_t(4, 3_000) * 0.01
+    returns[1_000:1_300] = 0.0  # Ties
+    levels = (0.95, 0.99)
+    labels, values = rolling_var(returns, window=window, levels=levels)
+
+    windows = np.lib.stride_tricks.sliding_window_view(returns, window)
+    for i, level in enumerate(levels):
+        expected_var = -100 * pd.Series(returns).rolling(window).quantile(1 - level, interpolation='linear')
+        assert labels[i] == f"VaR_{round(level * 100)}"
+        np.testing.assert_allclose(values[:, i], expected_var.to_numpy(), rtol=1e-9, equal_nan=True)
+
+        # CVaR: mean of the tail's smallest returns of each window, sorted in full
+        tail = max(1, int(np.ceil((1 - level) * window)))
+        expected_cvar = -100 * np.sort(windows, axis=1)[:, :tail].mean(axis=1)
+        assert np.isnan(values[:window - 1, len(levels) + i]).all()
+        np.testing.assert_allclose(values[window - 1:, len(levels) + i], expected_cvar, rtol=1e-9)
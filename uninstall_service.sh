@@ -7,6 +7,9 @@ set -e
 SERVICE_NAME="stock-rava.service"
 USER_SERVICE_DIR="$HOME/.config/systemd/user"
 SERVICE_FILE="$USER_SERVICE_DIR/$SERVICE_NAME"
+PREFETCH_SERVICE_NAME="stock-rava-prefetch.service"
+PREFETCH_TIMER_NAME="stock-rava-prefetch.timer"
+WORKER_TEMPLATE_NAME="stock-rava@.service"
 
 # Colors
 GREEN='\033[0;32m'
@@ -18,13 +21,33 @@ NC='\033[0m'
 echo -e "${CYAN}Uninstalling Stock RAVA systemd service...${NC}"
 echo ""
 
+# Stop and disable the workers of a --workers install
+WORKERS_REMOVED=false
+if [ -f "$USER_SERVICE_DIR/$WORKER_TEMPLATE_NAME" ]; then
+    echo -e "${CYAN}Removing dashboard workers...${NC}"
+    for link in "$USER_SERVICE_DIR"/*.wants/stock-rava@*.service; do
+        [ -L "$link" ] && systemctl --user disable --now "$(basename "$link")" 2>/dev/null || true
+    done
+    rm -f "${USER_SERVICE_DIR:?}/${WORKER_TEMPLATE_NAME:?}"
+    echo -e "${GREEN}✓ Workers removed${NC}"
+    WORKERS_REMOVED=true
+fi
+
 # Check if service exists
-if [ ! -f "$SERVICE_FILE" ]; then
+if [ ! -f "$SERVICE_FILE" ] && [ "$WORKERS_REMOVED" != true ]; then
     echo -e "${YELLOW}⚠ Service file not found: $SERVICE_FILE${NC}"
     echo "Service may not be installed."
     exit 0
 fi
 
+# Stop and disable the prefetch timer if installed
+if [ -f "$USER_SERVICE_DIR/$PREFETCH_TIMER_NAME" ]; then
+    echo -e "${CYAN}Removing prefetch timer...${NC}"
+    systemctl --user disable --now "$PREFETCH_TIMER_NAME" 2>/dev/null || true
+    rm -f "${USER_SERVICE_DIR:?}/${PREFETCH_TIMER_NAME:?}" "${USER_SERVICE_DIR:?}/${PREFETCH_SERVICE_NAME:?}"
+    echo -e "${GREEN}✓ Prefetch timer removed${NC}"
+fi
+
 # Stop service if running
 if systemctl --user is-active --quiet "$SERVICE_NAME" 2>/dev/null; then
     echo -e "${CYAN}Stopping service...${NC}"